@@ -0,0 +1,128 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import re
+import sys
+
+import degrees
+
+
+def read_queries(filename):
+    """
+    Read (line, source, target) queries from a CSV file of name or id
+    pairs, one pair per row. Names may end in a birth year, as in
+    "Chris Evans (1981)". Blank rows and rows starting with # are skipped.
+    """
+    queries = []
+    with open(filename, encoding="utf-8", newline="") as f:
+        for line, row in enumerate(csv.reader(f), start=1):
+            if not row or row[0].startswith("#"):
+                continue
+            if len(row) != 2:
+                sys.exit(f"{filename}:{line}: expected a source and a target")
+            queries.append((line, row[0].strip(), row[1].strip()))
+    return queries
+
+
+def resolve_person(value):
+    """
+    Return the person id for an IMDb id or an unambiguous name, or None.
+    A name may carry a birth year to tell namesakes apart, as in
+    "Chris Evans (1981)".
+    """
+    if degrees.graph is not None:
+        if degrees.graph.person_index(value) is not None:
+            return value
+    elif value in degrees.people:
+        return value
+    match = re.fullmatch(r"(.*?)\s*\((\d{4})\)", value)
+    if match:
+        return degrees.person_id_for_name(match.group(1), interactive=False, birth=match.group(2))
+    return degrees.person_id_for_name(value, interactive=False)
+
+
+def group_queries(queries):
+    """
+    Group queries by resolved source id.
+
+    Returns a list of (source_id, [(line, source, target, target_id)])
+    groups and a list of result records for queries that failed to resolve.
+    """
+    groups = {}
+    errors = []
+    for line, source, target in queries:
+        source_id, target_id = resolve_person(source), resolve_person(target)
+        if source_id is None or target_id is None:
+            missing = source if source_id is None else target
+            errors.append({"line": line, "source": source, "target": target,
+                           "error": f"person not found or ambiguous: {missing}"})
+            continue
+        groups.setdefault(source_id, []).append((line, source, target, target_id))
+    return list(groups.items()), errors
+
+
+def answer_group(group):
+    """
+    Answer every query of a (source_id, queries) group with one BFS tree.
+    """
+    source_id, queries = group
+    paths = degrees.shortest_path_tree(source_id, {target_id for _, _, _, target_id in queries})
+    results = []
+    for line, source, target, target_id in queries:
+        path = paths[target_id]
+        results.append({
+            "line": line,
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path
+        })
+    return results
+
+
+def run(queries, output, workers=1):
+    """
+    Answer `queries` and write one JSON object per line to `output`.
+
+    With more than one worker, groups are fanned out over a forked
+    process pool, which shares the already loaded graph copy-on-write.
+    """
+    groups, errors = group_queries(queries)
+    for record in errors:
+        output.write(json.dumps(record) + "\n")
+
+    if workers > 1:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            for results in pool.imap_unordered(answer_group, groups):
+                for record in results:
+                    output.write(json.dumps(record) + "\n")
+    else:
+        for group in groups:
+            for record in answer_group(group):
+                output.write(json.dumps(record) + "\n")
+    output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer many degrees of separation queries")
+    parser.add_argument("queries", help="CSV file of source,target name or id pairs")
+    parser.add_argument("directory", nargs="?", default="src/large")
+    parser.add_argument("--output", help="JSONL file to write (default: standard output)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the data into a compact integer-indexed graph")
+    args = parser.parse_args()
+
+    queries = read_queries(args.queries)
+    degrees.load_data(args.directory, compact=args.compact)
+    if args.output is None:
+        run(queries, sys.stdout, args.workers)
+    else:
+        with open(args.output, "w", encoding="utf-8") as output:
+            run(queries, output, args.workers)
+
+
+if __name__ == "__main__":
+    main()
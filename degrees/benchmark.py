@@ -0,0 +1,377 @@
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+from graph import Graph
+from ingest import load_csv
+from landmarks import LandmarkOracle
+from util import Node, StackFrontier, QueueFrontier, ExploredBitmap
+
+
+SYLLABLES = ("an", "bel", "cor", "da", "el", "fin", "gra", "hal", "is", "jo", "ka", "lin",
+             "mar", "no", "or", "pe", "quin", "ro", "sa", "tor", "ul", "ve", "wil", "xa", "yor", "zen",
+             "ber", "chi", "dre", "ev", "fra", "gil", "har", "ian", "jen", "kel", "lo", "mi", "nat",
+             "ol", "pri", "rey", "sha", "tan", "ur", "vic", "wen", "yu", "zo", "sten", "ly", "mon")
+
+
+def random_name(rng):
+    """
+    Return a made-up "First Last" name built from syllables.
+    """
+    def word(length):
+        return "".join(rng.choice(SYLLABLES) for _ in range(length)).capitalize()
+    return f"{word(rng.randint(1, 3))} {word(rng.randint(2, 4))}"
+
+
+def generate_dataset(directory, num_people, num_movies, cast_size=6, seed=0):
+    """
+    Write a synthetic people/movies/stars dataset into `directory`.
+
+    Casting is skewed so that a few people appear in many movies,
+    which gives the co-star graph the hub-heavy shape of the IMDb data.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            writer.writerow([i + 1, random_name(rng), rng.randint(1920, 2005)])
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            writer.writerow([i + 1, f"Movie {i + 1}", rng.randint(1930, 2020)])
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(num_movies):
+            cast = {int(num_people * rng.random() ** 2) + 1 for _ in range(cast_size)}
+            for person in sorted(cast):
+                writer.writerow([person, movie + 1])
+
+
+def dataset_directory(args):
+    """
+    Return the directory to benchmark, generating a synthetic one if asked.
+    """
+    if args.synthetic is None:
+        return args.directory
+    directory = os.path.join(tempfile.gettempdir(), f"degrees-synthetic-{args.synthetic}")
+    if not os.path.exists(os.path.join(directory, "stars.csv")):
+        generate_dataset(directory, args.synthetic, args.synthetic // 2)
+    return directory
+
+
+def random_pairs(count, seed):
+    """
+    Return `count` pairs of distinct person ids that star in a movie.
+    """
+    rng = random.Random(seed)
+    if degrees.graph is not None:
+        graph = degrees.graph
+        candidates = sorted(graph.person_ids[p] for p in range(graph.num_people) if graph.movies_for(p))
+    else:
+        candidates = sorted(person_id for person_id in degrees.people if degrees.people[person_id]["movies"])
+    return [tuple(rng.sample(candidates, 2)) for _ in range(count)]
+
+
+def unload():
+    """
+    Drop whatever dataset degrees.py currently has loaded.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+    degrees.neighbor_index = None
+
+
+def bench_search(args):
+    """
+    Compare one-sided and bidirectional BFS on random pairs.
+    """
+    degrees.load_data(dataset_directory(args))
+    pairs = random_pairs(args.pairs, args.seed)
+
+    results = {}
+    for label, bidirectional in (("one-sided", False), ("bidirectional", True)):
+        stats = {"expanded": 0}
+        lengths = []
+        start = time.perf_counter()
+        for source, target in pairs:
+            path = degrees.shortest_path(source, target, bidirectional=bidirectional, stats=stats)
+            lengths.append(None if path is None else len(path))
+        elapsed = time.perf_counter() - start
+        results[label] = lengths
+        print(f"{label:>14}: {stats['expanded']:>10} expanded  {elapsed:9.4f}s  "
+              f"({elapsed / len(pairs) * 1000:.3f} ms/query)")
+
+    if results["one-sided"] != results["bidirectional"]:
+        sys.exit("Path lengths differ between search modes.")
+
+
+def bench_memory(args):
+    """
+    Compare memory, load time and query latency of the dict and CSR loaders.
+    """
+    directory = dataset_directory(args)
+    pairs = None
+    for label, compact in (("dict", False), ("compact", True)):
+        unload()
+        tracemalloc.start()
+        start = time.perf_counter()
+        degrees.load_data(directory, compact=compact)
+        load_time = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if pairs is None:
+            pairs = random_pairs(args.pairs, args.seed)
+        start = time.perf_counter()
+        for source, _ in pairs:
+            degrees.neighbors_for_person(source)
+        neighbors_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for source, target in pairs:
+            degrees.shortest_path(source, target, bidirectional=True)
+        search_time = time.perf_counter() - start
+
+        print(f"{label:>8}: {current / 2 ** 20:9.2f} MiB resident  {peak / 2 ** 20:9.2f} MiB peak  "
+              f"load {load_time:7.3f}s  neighbors {neighbors_time / len(pairs) * 1e6:9.1f} us  "
+              f"search {search_time / len(pairs) * 1e3:8.3f} ms")
+
+
+def bench_index(args):
+    """
+    Compare co-star index modes: build time, memory and search latency.
+    """
+    directory = dataset_directory(args)
+    pairs = None
+    for mode in ("off", "full", "lru"):
+        unload()
+        degrees.load_data(directory, compact=args.compact)
+        if pairs is None:
+            pairs = random_pairs(args.pairs, args.seed)
+        neighbors_for = degrees.neighbor_index
+        tracemalloc.start()
+        start = time.perf_counter()
+        degrees.neighbor_index = degrees.costar_index(
+            mode, neighbors_for, graph=degrees.graph, people=degrees.people,
+            movies=degrees.movies, cache_size=args.cache_size
+        )
+        build_time = time.perf_counter() - start
+        index_size = tracemalloc.get_traced_memory()[0]
+
+        lengths = []
+        start = time.perf_counter()
+        for source, target in pairs:
+            path = degrees.shortest_path(source, target)
+            lengths.append(None if path is None else len(path))
+        search_time = time.perf_counter() - start
+        total_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{mode:>5}: build {build_time:8.3f}s  index {index_size / 2 ** 20:8.2f} MiB  "
+              f"after search {total_size / 2 ** 20:8.2f} MiB  search {search_time / len(pairs) * 1e3:8.3f} ms")
+
+
+def bench_oracle(args):
+    """
+    Time building a landmark oracle, its bound queries, and ALT search
+    against bidirectional BFS.
+    """
+    degrees.load_data(dataset_directory(args), compact=True)
+    graph = degrees.graph
+    pairs = random_pairs(args.pairs, args.seed)
+    indices = [(graph.person_index(s), graph.person_index(t)) for s, t in pairs]
+
+    start = time.perf_counter()
+    oracle = LandmarkOracle.build(graph, args.k, degrees.expander(), strategy=args.strategy)
+    build_time = time.perf_counter() - start
+    print(f"build: {len(oracle.landmarks)} landmarks ({args.strategy}) in {build_time:.3f}s, "
+          f"{oracle.nbytes() / 2 ** 20:.2f} MiB")
+
+    start = time.perf_counter()
+    bounds = [oracle.bounds(u, v) for u, v in indices]
+    bound_time = time.perf_counter() - start
+    print(f"bounds: {bound_time / len(pairs) * 1e6:.1f} us/query")
+
+    exact, tight = 0, 0
+    results = {}
+    for label, options in (("bidirectional", {"bidirectional": True}), ("ALT", {"oracle": oracle})):
+        stats = {"expanded": 0}
+        start = time.perf_counter()
+        results[label] = [degrees.shortest_path(s, t, stats=stats, **options) for s, t in pairs]
+        elapsed = time.perf_counter() - start
+        print(f"{label:>14}: {stats['expanded']:>10} expanded  {elapsed / len(pairs) * 1e3:8.3f} ms/query")
+
+    for (lower, upper), path in zip(bounds, results["bidirectional"]):
+        distance = math.inf if path is None else len(path)
+        if not lower <= distance <= (math.inf if upper is None else upper):
+            sys.exit(f"Bounds {lower}..{upper} do not contain {distance}.")
+        exact += lower == distance
+        tight += upper == distance
+    print(f"lower bound exact for {exact}/{len(pairs)}, upper bound exact for {tight}/{len(pairs)}")
+
+    lengths = [[None if path is None else len(path) for path in paths] for paths in results.values()]
+    if lengths[0] != lengths[1]:
+        sys.exit("Path lengths differ between search modes.")
+
+
+def bench_names(args):
+    """
+    Time exact, prefix and fuzzy name lookups for both loaders.
+    """
+    directory = dataset_directory(args)
+    for compact in (False, True):
+        unload()
+        degrees.load_data(directory, compact=compact)
+        index = degrees.name_index
+        rng = random.Random(args.seed)
+        sample = [index.name_of(index.order[rng.randrange(len(index.order))]) for _ in range(args.queries)]
+        typos = []
+        for name in sample:
+            i = rng.randrange(2, len(name))
+            typos.append(name[:i] + name[i + 1:])
+
+        # The fuzzy segment index is built on first use; time that apart
+        start = time.perf_counter()
+        index.fuzzy(sample[0])
+        build = time.perf_counter() - start
+
+        timings = {}
+        for label, lookup, queries in (
+            ("exact", index.exact, sample),
+            ("prefix", lambda name: index.prefix(name[:4]), sample),
+            ("fuzzy", index.fuzzy, typos)
+        ):
+            start = time.perf_counter()
+            found = sum(bool(lookup(name)) for name in queries)
+            timings[label] = ((time.perf_counter() - start) / len(queries) * 1e6, found)
+        print(f"{'compact' if compact else 'dict':>8}: " + "  ".join(
+            f"{label} {micros:8.1f} us ({found}/{len(sample)} found)"
+            for label, (micros, found) in timings.items()
+        ) + f"  fuzzy index built in {build:.2f} s")
+
+
+def bench_load(args):
+    """
+    Compare serial and chunked multi-process CSV loading, phase by phase.
+    """
+    directory = dataset_directory(args)
+    runs = [("serial", lambda: Graph.from_csv(directory))]
+    for workers in args.workers:
+        runs.append((f"{workers} workers", lambda workers=workers: load_csv(directory, workers, args.chunk_size)))
+
+    reference = None
+    for label, load in runs:
+        # tracemalloc slows allocation-heavy phases a lot, so it is opt-in
+        if args.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        graph = load()
+        elapsed = time.perf_counter() - start
+        memory = ""
+        if args.trace_memory:
+            memory = f"  parent peak {tracemalloc.get_traced_memory()[1] / 2 ** 20:8.2f} MiB"
+            tracemalloc.stop()
+        phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in getattr(graph, "timings", {}).items())
+        print(f"{label:>10}: {elapsed:7.2f}s{memory}  {phases}")
+
+        layout = (bytes(graph.person_offsets), bytes(graph.person_movies), bytes(graph.movie_people))
+        if reference is None:
+            reference = layout
+        elif layout != reference:
+            sys.exit(f"{label} built a different graph.")
+
+
+def bench_frontier(args):
+    """
+    Time util.py frontier and explored operations at growing sizes.
+    """
+    print(f"{'structure':>16} {'nodes':>9} {'add':>10} {'contains':>10} {'remove':>10}  (ns/op)")
+    for exponent in range(3, args.max_exponent + 1):
+        n = 10 ** exponent
+        for frontier_class in (StackFrontier, QueueFrontier):
+            frontier = frontier_class()
+            nodes = [Node(i, None, None) for i in range(n)]
+            start = time.perf_counter()
+            for node in nodes:
+                frontier.add(node)
+            added = time.perf_counter()
+            for i in range(0, 2 * n, 2):
+                frontier.contains_state(i)
+            checked = time.perf_counter()
+            while not frontier.empty():
+                frontier.remove()
+            removed = time.perf_counter()
+            print(f"{frontier_class.__name__:>16} {n:>9} {(added - start) / n * 1e9:>10.0f} "
+                  f"{(checked - added) / n * 1e9:>10.0f} {(removed - checked) / n * 1e9:>10.0f}")
+
+        for label, explored in (("set", set()), ("ExploredBitmap", ExploredBitmap(2 * n))):
+            start = time.perf_counter()
+            for i in range(n):
+                explored.add(i)
+            added = time.perf_counter()
+            for i in range(0, 2 * n, 2):
+                i in explored
+            checked = time.perf_counter()
+            print(f"{label:>16} {n:>9} {(added - start) / n * 1e9:>10.0f} "
+                  f"{(checked - added) / n * 1e9:>10.0f} {'':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for degrees.py")
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("--synthetic", type=int, metavar="PEOPLE",
+                        help="generate and use a synthetic dataset of this many people")
+    parser.add_argument("--seed", type=int, default=0)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    search = subparsers.add_parser("search", help="one-sided vs bidirectional BFS")
+    search.add_argument("--pairs", type=int, default=100)
+    search.set_defaults(run=bench_search)
+
+    memory = subparsers.add_parser("memory", help="dict vs compact CSR representation")
+    memory.add_argument("--pairs", type=int, default=100)
+    memory.set_defaults(run=bench_memory)
+
+    index = subparsers.add_parser("index", help="co-star index modes")
+    index.add_argument("--pairs", type=int, default=100)
+    index.add_argument("--cache-size", type=int, default=100000)
+    index.add_argument("--compact", action="store_true")
+    index.set_defaults(run=bench_index)
+
+    oracle = subparsers.add_parser("oracle", help="landmark distance oracle and ALT search")
+    oracle.add_argument("--pairs", type=int, default=100)
+    oracle.add_argument("-k", type=int, default=16, help="number of landmarks")
+    oracle.add_argument("--strategy", choices=("farthest", "degree", "random"), default="farthest")
+    oracle.set_defaults(run=bench_oracle)
+
+    names = subparsers.add_parser("names", help="exact, prefix and fuzzy name lookups")
+    names.add_argument("--queries", type=int, default=1000)
+    names.set_defaults(run=bench_names)
+
+    load = subparsers.add_parser("load", help="serial vs chunked multi-process CSV loading")
+    load.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    load.add_argument("--chunk-size", type=int, default=2 ** 20, help="bytes per parse task")
+    load.add_argument("--trace-memory", action="store_true", help="also report peak memory of the parent")
+    load.set_defaults(run=bench_load)
+
+    frontier = subparsers.add_parser("frontier", help="util.py frontier micro-benchmarks")
+    frontier.add_argument("--max-exponent", type=int, default=6, help="largest size, as a power of ten")
+    frontier.set_defaults(run=bench_frontier)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
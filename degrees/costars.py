@@ -0,0 +1,96 @@
+from array import array
+from functools import lru_cache
+
+# Rough cost of one (movie, co-star) entry in each representation
+COMPACT_ENTRY_BYTES = 8
+DICT_ENTRY_BYTES = 120
+
+MODES = ("off", "full", "lru", "auto")
+
+
+def unique_costars(pairs, person):
+    """
+    Keep the first witnessing movie for each co-star of `person`.
+    """
+    seen = {}
+    for movie, costar in pairs:
+        if costar != person and costar not in seen:
+            seen[costar] = movie
+    return tuple((movie, costar) for costar, movie in seen.items())
+
+
+class CompactCostarIndex():
+    """
+    Precomputed co-star lists for a compact graph, stored in CSR form:
+    the co-stars of person `p` are `people[offsets[p]:offsets[p + 1]]`,
+    each witnessed by the movie at the same position in `movies`.
+    """
+
+    def __init__(self, graph):
+        self.offsets = array("i", [0])
+        self.people = array("i")
+        self.movies = array("i")
+        for p in range(graph.num_people):
+            for movie, costar in unique_costars(graph.neighbors(p), p):
+                self.movies.append(movie)
+                self.people.append(costar)
+            self.offsets.append(len(self.people))
+
+    def __call__(self, p):
+        start, end = self.offsets[p], self.offsets[p + 1]
+        return zip(self.movies[start:end], self.people[start:end])
+
+
+class CostarIndex():
+    """
+    Precomputed co-star tuples for every person of the dict representation.
+    """
+
+    def __init__(self, neighbors_for, people):
+        self.table = {person: unique_costars(neighbors_for(person), person) for person in people}
+
+    def __call__(self, person):
+        return self.table[person]
+
+
+def estimate_index_bytes(graph=None, movies=None):
+    """
+    Estimate the memory a full index would take, counting every pair of
+    people who share a movie.
+    """
+    if graph is not None:
+        offsets = graph.movie_offsets
+        pairs = sum((offsets[m + 1] - offsets[m]) ** 2 for m in range(graph.num_movies))
+        return pairs * COMPACT_ENTRY_BYTES
+    pairs = sum(len(movie["stars"]) ** 2 for movie in movies.values())
+    return pairs * DICT_ENTRY_BYTES
+
+
+def costar_index(mode, neighbors_for, graph=None, people=None, movies=None,
+                 cache_size=100000, memory_budget=None):
+    """
+    Return a function giving the (movie, co-star) pairs of a person.
+
+    "off" returns `neighbors_for` itself, walking movies on every call.
+    "full" precomputes every person's co-stars up front. "lru" computes
+    them lazily and keeps the `cache_size` most recently used people.
+    "auto" picks "full" when the estimated index fits in `memory_budget`
+    bytes and "lru" otherwise.
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown neighbor index mode: {mode}")
+    if mode == "auto":
+        if memory_budget is not None and estimate_index_bytes(graph, movies) <= memory_budget:
+            mode = "full"
+        else:
+            mode = "lru"
+
+    if mode == "off":
+        return neighbors_for
+    if mode == "full":
+        return CompactCostarIndex(graph) if graph is not None else CostarIndex(neighbors_for, people)
+
+    @lru_cache(maxsize=cache_size)
+    def cached(person):
+        return unique_costars(neighbors_for(person), person)
+    return cached
@@ -1,7 +1,18 @@
+import argparse
 import csv
+import heapq
+import math
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from costars import MODES, costar_index
+from landmarks import load_oracle
+from nameindex import NameIndex
+from snapshot import fingerprint, load_graph
+from util import Node, StackFrontier, QueueFrontier, ExploredBitmap
+
+# Landmark oracle kept in the data directory unless --landmarks-file says otherwise
+LANDMARKS_NAME = "degrees.landmarks"
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +23,40 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used in place of the dicts above when loaded
+graph = None
+
+# Function giving the (movie, co-star) pairs searches expand a person into
+neighbor_index = None
 
-def load_data(directory):
+# Sorted name index for exact, prefix and fuzzy lookups
+name_index = None
+
+def load_data(directory, compact=False, snapshot=True, index="off", cache_size=100000, memory_budget=None,
+              workers=None):
     """
     Load data from CSV files into memory.
+
+    With `compact` set, the data is loaded into a CSR `Graph` instead of
+    the `names`, `people` and `movies` dicts. Unless `snapshot` is False,
+    the compact graph is cached as a binary snapshot in `directory` and
+    mapped from it on later runs. With `workers`, the compact loader
+    parses the CSVs in chunks across that many processes.
+
+    `index` chooses how searches find co-stars: "off" walks movies on
+    every expansion, "full" precomputes every person's co-stars, "lru"
+    caches the `cache_size` most recent people and "auto" picks "full"
+    only if it fits in `memory_budget` bytes.
     """
+    global graph, neighbor_index, name_index
+    if compact:
+        graph = load_graph(directory, use_snapshot=snapshot, workers=workers)
+        name_index = NameIndex.from_graph(graph)
+        neighbor_index = costar_index(index, graph.neighbors, graph=graph,
+                                      cache_size=cache_size, memory_budget=memory_budget)
+        return
+    graph = None
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,16 +91,50 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    name_index = NameIndex.from_people(people)
+    neighbor_index = costar_index(index, neighbors_for_person, people=people, movies=movies,
+                                  cache_size=cache_size, memory_budget=memory_budget)
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "src/large"
+    parser = argparse.ArgumentParser(description="Degrees of separation between two actors")
+    parser.add_argument("directory", nargs="?", default="src/large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the data into a compact integer-indexed graph")
+    parser.add_argument("--no-snapshot", dest="snapshot", action="store_false",
+                        help="with --compact, always parse the CSV files instead of using the snapshot")
+    parser.add_argument("--index", choices=MODES, default="off",
+                        help="co-star index used to expand people during search")
+    parser.add_argument("--cache-size", type=int, default=100000,
+                        help="people kept by the lru index")
+    parser.add_argument("--memory-budget", type=int, metavar="BYTES",
+                        help="largest full index the auto mode may build")
+    parser.add_argument("--workers", type=int,
+                        help="with --compact, parse the CSV files in chunks across this many processes")
+    parser.add_argument("--landmarks", type=int, metavar="K",
+                        help="with --compact, search with an oracle of K landmark actors")
+    parser.add_argument("--landmarks-file", metavar="PATH",
+                        help="where the landmark oracle is kept between runs "
+                             "(default: degrees.landmarks in the data directory)")
+    parser.add_argument("--bitmap", action="store_true",
+                        help="with --compact, track explored people in a bitmap to save memory")
+    args = parser.parse_args()
+    if args.landmarks and not args.compact:
+        parser.error("--landmarks needs --compact")
+    if args.bitmap and not args.compact:
+        parser.error("--bitmap needs --compact")
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory, compact=args.compact, snapshot=args.snapshot, index=args.index,
+              cache_size=args.cache_size, memory_budget=args.memory_budget, workers=args.workers)
     print("Data loaded.")
+    if getattr(graph, "timings", None):
+        print("Load phases: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in graph.timings.items()))
+    oracle = None
+    if args.landmarks:
+        path = args.landmarks_file or os.path.join(args.directory, LANDMARKS_NAME)
+        oracle = load_oracle(path, graph, args.landmarks, expander(), fingerprint(args.directory))
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +143,10 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if oracle is not None:
+        lower, upper = distance_bounds(source, target, oracle)
+        print(f"Landmark bounds: at least {lower}, at most {'?' if upper is None else upper} degrees.")
+    path = shortest_path(source, target, oracle=oracle, bitmap=args.bitmap)
 
     if path is None:
         print("Not connected.")
@@ -78,23 +155,169 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_record(path[i][1])["name"]
+            person2 = person_record(path[i + 1][1])["name"]
+            movie = movie_record(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, stats=None, oracle=None, bitmap=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
-    that connect the source to the target.
+    that connect the source to the target, empty if they are the
+    same person.
 
     If no possible path, returns None.
+
+    With `bidirectional` set, frontiers are grown from both the source
+    and the target until they meet. With a `LandmarkOracle` as `oracle`
+    (compact graph only), an A* search guided by landmark distance bounds
+    is used instead. If `stats` is a dict, the number of people whose
+    neighbors were expanded is added to `stats["expanded"]`.
+
+    One-sided searches on the compact graph track explored people in a
+    set. With `bitmap` set they use an `ExploredBitmap` instead, which
+    is slower per lookup but takes one bit per person however many are
+    explored, for searches that would not fit in memory otherwise.
+    """
+    search = bidirectional_search if bidirectional else breadth_first_search
+    if oracle is not None and graph is None:
+        raise ValueError("landmark search needs the compact graph")
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+        if source is None or target is None:
+            return None
+    if source == target:
+        return []  # Zero degrees, whichever search would have run
+    if graph is not None:
+        if oracle is not None:
+            return graph.path_ids(landmark_search(source, target, expander(), oracle, stats))
+        if bidirectional:
+            return graph.path_ids(search(source, target, expander(), stats))
+        explored = ExploredBitmap(graph.num_people) if bitmap else None
+        return graph.path_ids(search(source, target, expander(), stats, explored))
+    return search(source, target, expander(), stats)
+
+
+def distance_bounds(source, target, oracle):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from a `LandmarkOracle`, without searching.
+    """
+    if graph is None:
+        raise ValueError("landmark bounds need the compact graph")
+    return oracle.bounds(graph.person_index(source), graph.person_index(target))
+
+
+def landmark_search(source, target, neighbors_for, oracle, stats=None):
+    """
+    A* search from `source` to `target` using the landmark lower bound
+    as heuristic (ALT). Every movie costs one step, so the first time
+    `target` is taken off the queue its path is a shortest one.
+    """
+    estimate = oracle.heuristic(target)
+    if estimate(source) == math.inf:
+        return None
+
+    parents = {source: (None, None)}
+    cost = {source: 0}
+    # Ties on the estimate go to the deepest entry, which is closest to the target
+    queue = [(estimate(source), 0, source)]
+    while queue:
+        _, depth, person_id = heapq.heappop(queue)
+        distance = -depth
+        if distance > cost[person_id]:
+            continue  # Stale entry for a person already reached more cheaply
+        if person_id == target:
+            path = []
+            while parents[person_id][0] is not None:
+                previous, movie_id = parents[person_id]
+                path.append((movie_id, person_id))
+                person_id = previous
+            path.reverse()
+            return path
+
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + 1
+        for movie_id, neighbor in neighbors_for(person_id):
+            if neighbor in cost and cost[neighbor] <= distance + 1:
+                continue
+            remaining = estimate(neighbor)
+            if remaining == math.inf:
+                continue
+            cost[neighbor] = distance + 1
+            parents[neighbor] = (person_id, movie_id)
+            heapq.heappush(queue, (distance + 1 + remaining, -(distance + 1), neighbor))
+    return None
+
+
+def shortest_path_tree(source, targets):
+    """
+    Returns a dict mapping each of `targets` to the shortest list of
+    (movie_id, person_id) pairs from `source`, or None if unreachable.
+
+    A single breadth-first search from `source` answers every target.
     """
+    if graph is not None:
+        start = graph.person_index(source)
+        indices = {target: graph.person_index(target) for target in targets}
+        if start is None:
+            return {target: None for target in targets}
+        tree = breadth_first_tree(start, {i for i in indices.values() if i is not None}, expander())
+        return {
+            target: graph.path_ids(tree.get(i)) if i is not None else None
+            for target, i in indices.items()
+        }
+    tree = breadth_first_tree(source, set(targets), expander())
+    return {target: tree.get(target) for target in targets}
+
+
+def breadth_first_tree(source, targets, neighbors_for):
+    """
+    Breadth-first search from `source` that stops once every state in
+    `targets` has been reached. Returns a dict from each reached target
+    to its (action, state) path.
+    """
+    seen = {source}
+    reached = {}
+    if source in targets:
+        reached[source] = Node(source, None, None)
+    frontier = QueueFrontier()
+    frontier.add(Node(source, None, None))
+    while len(reached) < len(targets) and not frontier.empty():
+        node = frontier.remove()
+        for action, state in neighbors_for(node.state):
+            if state in seen:
+                continue
+            seen.add(state)
+            child = Node(state, node, action)
+            if state in targets:
+                reached[state] = child
+            frontier.add(child)
+
+    paths = {}
+    for target, node in reached.items():
+        path = []
+        while node.parent is not None:
+            path.append((node.action, node.state))
+            node = node.parent
+        path.reverse()
+        paths[target] = path
+    return paths
+
+
+def breadth_first_search(source, target, neighbors_for, stats=None, explored=None):
+    """
+    One-sided breadth-first search from `source` to `target`, where
+    `neighbors_for(state)` returns the (action, state) pairs of a state.
 
+    `explored` may be any object with `add` and `in`, such as an
+    `ExploredBitmap` for integer states; it defaults to a set.
+    """
     start = Node(source, None, None) # Create start state with no action nor parent
     frontier = QueueFrontier() # Create a QueueFrontier which will be our queue for BFS
-    explored = [] # Explored list so we dont reiterate over explored actor's IDs
+    if explored is None:
+        explored = set() # Explored set so we dont reiterate over explored actor's IDs
 
     frontier.add(start) # Add our start state to the frontier
 
@@ -104,9 +327,11 @@ def shortest_path(source, target):
 
         node = frontier.remove() # Otherwise remove our node first in queue
         if node.state not in explored: # Check if our node's state is not in explored to avoid adding for redundancy
-            explored.append(node.state) # Add our node's state into explored
+            explored.add(node.state) # Add our node's state into explored
 
-        neighbors = neighbors_for_person(node.state) # Get our neighbors with a helper function which returns all people associated with the movies that person starred in
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + 1
+        neighbors = neighbors_for(node.state) # Get our neighbors with a helper function which returns all people associated with the movies that person starred in
         for neighbor in neighbors: # Loop over each neighbor
             if neighbor[1] in explored: # If our neighbor, which is a list of (movie_id, star_id) matches one of explored states
                 continue
@@ -121,26 +346,105 @@ def shortest_path(source, target):
                     node = node.parent # Traverse the parents
 
                 connection.reverse() # Reverse the list to get a chain from source to target.
-                print(connection) # Test to see the list
                 return connection # Return the list.
 
             else: # Otherwise our child is not the target
-                explored.append(child.state) # Add to explored state
+                explored.add(child.state) # Add to explored state
                 frontier.add(child) # Add the child to the frontier
 
 
-def person_id_for_name(name):
+def bidirectional_search(source, target, neighbors_for, stats=None):
+    """
+    Breadth-first search grown from both ends of the co-star graph.
+
+    Each round expands one whole level of the smaller frontier. Once the
+    frontiers touch, the meeting person with the shortest combined
+    distance is joined into a single (movie_id, person_id) path.
+    """
+    if source == target:
+        return []
+
+    # Each side maps a person to (previous person, movie) and a distance
+    parents = ({source: (None, None)}, {target: (None, None)})
+    distance = ({source: 0}, {target: 0})
+    frontiers = ([source], [target])
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        other = 1 - side
+        meeting = None
+        next_frontier = []
+
+        for person_id in frontiers[side]:
+            if stats is not None:
+                stats["expanded"] = stats.get("expanded", 0) + 1
+            for movie_id, neighbor in neighbors_for(person_id):
+                if neighbor in parents[side]:
+                    continue
+                parents[side][neighbor] = (person_id, movie_id)
+                distance[side][neighbor] = distance[side][person_id] + 1
+                next_frontier.append(neighbor)
+                if neighbor in parents[other]:
+                    total = distance[side][neighbor] + distance[other][neighbor]
+                    if meeting is None or total < meeting[0]:
+                        meeting = (total, neighbor)
+
+        if meeting is not None:
+            return join_paths(parents[0], parents[1], meeting[1])
+        frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+
+    return None
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Joins the source half and target half of a bidirectional search
+    at `meeting` into a list of (movie_id, person_id) pairs.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id][0] is not None:
+        previous, movie_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id][0] is not None:
+        following, movie_id = backward[person_id]
+        path.append((movie_id, following))
+        person_id = following
+    return path
+
+
+def person_id_for_name(name, interactive=True, birth=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If `birth` is given, only people born that year match. If
+    `interactive` is False, ambiguous names return None instead of
+    prompting for an id.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if name_index is not None:
+        person_ids = name_index.exact(name, birth)
+    else:
+        person_ids = [
+            person_id for person_id in names.get(name.lower(), set())
+            if birth is None or people[person_id]["birth"] == str(birth)
+        ]
     if len(person_ids) == 0:
+        if interactive and name_index is not None:
+            suggestions = name_index.fuzzy(name, limit=5) or name_index.prefix(name, limit=5)
+            if suggestions:
+                print("Did you mean: " + ", ".join(match[-2] for match in suggestions) + "?")
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_record(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -160,6 +464,11 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {
+            (graph.movie_ids[m], graph.person_ids[p])
+            for m, p in graph.neighbors(graph.person_index(person_id))
+        }
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -168,5 +477,33 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def expander():
+    """
+    Returns the function searches use to expand a person into
+    (movie, co-star) pairs for the loaded representation.
+    """
+    if neighbor_index is not None:
+        return neighbor_index
+    return graph.neighbors if graph is not None else neighbors_for_person
+
+
+def person_record(person_id):
+    """
+    Returns a dict with the name and birth of a person.
+    """
+    if graph is not None:
+        return graph.person(graph.person_index(person_id))
+    return people[person_id]
+
+
+def movie_record(movie_id):
+    """
+    Returns a dict with the title and year of a movie.
+    """
+    if graph is not None:
+        return graph.movie(graph.movie_index(movie_id))
+    return movies[movie_id]
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,215 @@
+import csv
+from array import array
+from bisect import bisect_left
+
+
+class StringTable():
+    """
+    A read-only list of strings packed into a single UTF-8 blob,
+    with `offsets[i]:offsets[i + 1]` giving the bytes of string `i`.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array("q", [0])
+        chunks = []
+        position = 0
+        for string in strings:
+            encoded = string.encode("utf-8")
+            chunks.append(encoded)
+            position += len(encoded)
+            offsets.append(position)
+        return cls(b"".join(chunks), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+def build_csr(rows, columns, num_rows):
+    """
+    Group (row, column) pairs into CSR form.
+
+    Returns (offsets, indices) arrays where the columns of row `r` are
+    `indices[offsets[r]:offsets[r + 1]]`, sorted and without duplicates.
+    """
+    offsets = array("i", bytes(4 * (num_rows + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for row in range(num_rows):
+        offsets[row + 1] += offsets[row]
+
+    indices = array("i", bytes(4 * len(columns)))
+    cursor = offsets[:-1]
+    for row, column in zip(rows, columns):
+        indices[cursor[row]] = column
+        cursor[row] += 1
+
+    # Sort each row and drop repeated pairs, as the dict loader's sets would
+    unique_offsets = array("i", [0])
+    unique_indices = array("i")
+    for row in range(num_rows):
+        unique_indices.extend(sorted(set(indices[offsets[row]:offsets[row + 1]])))
+        unique_offsets.append(len(unique_indices))
+    return unique_offsets, unique_indices
+
+
+def surname_key(name):
+    """
+    Sort key putting a name's last word first, so "Kevin Bacon"
+    sorts as "bacon kevin".
+    """
+    first, _, last = name.lower().rpartition(" ")
+    return f"{last} {first}"
+
+
+def sorted_order(table, key):
+    """
+    Return the row numbers of `table` as an array sorted by `key(string)`.
+    """
+    return array("i", sorted(range(len(table)), key=lambda i: key(table[i])))
+
+
+class Graph():
+    """
+    Co-star graph with people and movies mapped to dense integers.
+
+    Adjacency is stored in CSR form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]` and the
+    stars of movie `m` are found the same way through `movie_offsets`
+    and `movie_people`. Ids, names and titles live in string tables,
+    looked up through sorted orders instead of per-row dicts.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_order=None, movie_order=None, name_order=None, surname_order=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.person_order = person_order if person_order is not None else sorted_order(person_ids, str)
+        self.movie_order = movie_order if movie_order is not None else sorted_order(movie_ids, str)
+        self.name_order = name_order if name_order is not None else sorted_order(person_names, str.lower)
+        self.surname_order = surname_order if surname_order is not None else sorted_order(person_names, surname_key)
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Load a people/movies/stars CSV directory into a compact graph.
+        """
+        people = read_table(f"{directory}/people.csv", ("id", "name", "birth"))
+        movies = read_table(f"{directory}/movies.csv", ("id", "title", "year"))
+        person_index = {person_id: i for i, person_id in enumerate(people[0])}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movies[0])}
+
+        star_people = array("i")
+        star_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            person_field, movie_field = header.index("person_id"), header.index("movie_id")
+            for row in reader:
+                try:
+                    person, movie = person_index[row[person_field]], movie_index[row[movie_field]]
+                except (KeyError, IndexError):  # Unknown ids, or a blank line
+                    continue
+                star_people.append(person)
+                star_movies.append(movie)
+
+        person_offsets, person_movies = build_csr(star_people, star_movies, len(person_index))
+        movie_offsets, movie_people = build_csr(star_movies, star_people, len(movie_index))
+        return cls(
+            *(StringTable.from_strings(column) for column in people),
+            *(StringTable.from_strings(column) for column in movies),
+            person_offsets, person_movies, movie_offsets, movie_people
+        )
+
+    @property
+    def num_people(self):
+        return len(self.person_offsets) - 1
+
+    @property
+    def num_movies(self):
+        return len(self.movie_offsets) - 1
+
+    def person_index(self, person_id):
+        """
+        Return the integer for IMDb `person_id`, or None if unknown.
+        """
+        return find(self.person_order, self.person_ids, person_id, str)
+
+    def movie_index(self, movie_id):
+        """
+        Return the integer for IMDb `movie_id`, or None if unknown.
+        """
+        return find(self.movie_order, self.movie_ids, movie_id, str)
+
+    def person(self, p):
+        return {"name": self.person_names[p], "birth": self.person_births[p]}
+
+    def movie(self, m):
+        return {"title": self.movie_titles[m], "year": self.movie_years[m]}
+
+    def movies_for(self, p):
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_for(self, m):
+        return self.movie_people[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbors(self, p):
+        """
+        Return (movie, person) integer pairs for everyone who starred with `p`.
+        """
+        movie_offsets, movie_people = self.movie_offsets, self.movie_people
+        return [
+            (m, q)
+            for m in self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+            for q in movie_people[movie_offsets[m]:movie_offsets[m + 1]]
+        ]
+
+    def path_ids(self, path):
+        """
+        Convert a path of (movie, person) integers back to IMDb ids.
+        """
+        if path is None:
+            return None
+        return [(self.movie_ids[m], self.person_ids[p]) for m, p in path]
+
+
+def read_table(filename, fields):
+    """
+    Read the given `fields` of a CSV file into one list per field.
+    """
+    columns = tuple([] for _ in fields)
+    with open(filename, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            for column, field in zip(columns, fields):
+                column.append(row[field])
+    return columns
+
+
+def find(order, table, value, key):
+    """
+    Binary search `order` (rows of `table` sorted by `key`) for `value`.
+    Returns the matching row or None.
+    """
+    value = key(value)
+    i = bisect_left(order, value, key=lambda row: key(table[row]))
+    if i < len(order) and key(table[order[i]]) == value:
+        return order[i]
+    return None
@@ -0,0 +1,194 @@
+import csv
+import io
+import multiprocessing
+import os
+import time
+from array import array
+
+from graph import Graph, StringTable, build_csr
+
+# Bytes of CSV parsed by one task
+CHUNK_SIZE = 8 * 2 ** 20
+
+# Filled in by the parent before forking, so star workers can map ids
+person_index = None
+movie_index = None
+
+
+def read_header(filename):
+    """
+    Return the column names of a CSV file and the byte offset its data starts at.
+    """
+    with open(filename, "rb") as f:
+        header = f.readline()
+        return next(csv.reader([header.decode("utf-8")])), len(header)
+
+
+def byte_ranges(filename, start, chunk_size):
+    """
+    Split `filename` from byte `start` into (start, end) ranges of about
+    `chunk_size` bytes that each begin and end on a row boundary.
+
+    A newline inside a quoted field does not end a row. Quotes within a
+    quoted field are doubled, so a newline is a row boundary exactly
+    when an even number of quote characters come before it; each range
+    is extended line by line until that holds.
+    """
+    size = os.path.getsize(filename)
+    ranges = []
+    with open(filename, "rb") as f:
+        f.seek(start)
+        while start < size:
+            quotes = f.read(chunk_size).count(b'"')
+            if f.tell() < size:
+                quotes += f.readline().count(b'"')
+            while quotes % 2 and f.tell() < size:
+                quotes += f.readline().count(b'"')
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_rows(filename, start, end):
+    with open(filename, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    return csv.reader(io.StringIO(text))
+
+
+def parse_table(task):
+    """
+    Parse the given columns of one byte range into packed string tables,
+    returned as (blob, offsets bytes) pairs.
+    """
+    filename, start, end, fields = task
+    columns = tuple([] for _ in fields)
+    needed = max(fields) + 1
+    for row in read_rows(filename, start, end):
+        if len(row) < needed:
+            continue  # Blank or truncated line
+        for column, field in zip(columns, fields):
+            column.append(row[field])
+    tables = (StringTable.from_strings(column) for column in columns)
+    return [(table.blob, table.offsets.tobytes()) for table in tables]
+
+
+def parse_stars(task):
+    """
+    Parse one byte range of stars.csv into person and movie integer arrays,
+    skipping rows whose person or movie is unknown.
+    """
+    filename, start, end, fields = task
+    person_field, movie_field = fields
+    people, movies = array("i"), array("i")
+    needed = max(fields) + 1
+    for row in read_rows(filename, start, end):
+        if len(row) < needed:
+            continue
+        person = person_index.get(row[person_field])
+        movie = movie_index.get(row[movie_field])
+        if person is not None and movie is not None:
+            people.append(person)
+            movies.append(movie)
+    return people.tobytes(), movies.tobytes()
+
+
+class TableMerger():
+    """
+    Concatenates string table shards, in order, into one StringTable.
+    """
+
+    def __init__(self):
+        self.blob = bytearray()
+        self.offsets = array("q", [0])
+
+    def add(self, blob, offsets):
+        shard = array("q")
+        shard.frombytes(offsets)
+        base = len(self.blob)
+        self.blob.extend(blob)
+        self.offsets.extend(base + offset for offset in shard[1:])
+
+    def table(self):
+        return StringTable(bytes(self.blob), self.offsets)
+
+
+def load_csv(directory, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Load a people/movies/stars CSV directory into a compact graph,
+    parsing byte ranges of each file in a pool of `workers` processes
+    (all cores by default).
+
+    Each task holds only one chunk of text, and shards are merged as they
+    arrive, so peak memory grows with the chunk size rather than the file
+    size. Time spent in each phase is recorded in `graph.timings`.
+    """
+    global person_index, movie_index
+    workers = workers or os.cpu_count()
+    timings = {}
+
+    def run(function, filename, fields):
+        header, start = read_header(filename)
+        positions = [header.index(field) for field in fields]
+        tasks = [(filename, s, e, positions) for s, e in byte_ranges(filename, start, chunk_size)]
+        if pool is None:
+            return map(function, tasks)
+        return pool.imap(function, tasks)
+
+    def load_table(filename, fields):
+        mergers = [TableMerger() for _ in fields]
+        for shard in run(parse_table, filename, fields):
+            for merger, (blob, offsets) in zip(mergers, shard):
+                merger.add(blob, offsets)
+        return [merger.table() for merger in mergers]
+
+    pool = None
+    context = multiprocessing.get_context("fork")
+    try:
+        if workers > 1:
+            pool = context.Pool(workers)
+
+        start = time.perf_counter()
+        people = load_table(os.path.join(directory, "people.csv"), ("id", "name", "birth"))
+        timings["people"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        movies = load_table(os.path.join(directory, "movies.csv"), ("id", "title", "year"))
+        timings["movies"] = time.perf_counter() - start
+
+        # Workers forked from here on inherit the id maps
+        start = time.perf_counter()
+        person_index = {people[0][i]: i for i in range(len(people[0]))}
+        movie_index = {movies[0][i]: i for i in range(len(movies[0]))}
+        timings["id maps"] = time.perf_counter() - start
+        if pool is not None:
+            pool.close()
+            pool.join()
+            pool = context.Pool(workers)
+
+        start = time.perf_counter()
+        star_people, star_movies = array("i"), array("i")
+        for people_bytes, movies_bytes in run(parse_stars, os.path.join(directory, "stars.csv"),
+                                              ("person_id", "movie_id")):
+            star_people.frombytes(people_bytes)
+            star_movies.frombytes(movies_bytes)
+        timings["stars"] = time.perf_counter() - start
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        person_index = movie_index = None
+
+    start = time.perf_counter()
+    num_people, num_movies = len(people[0]), len(movies[0])
+    person_offsets, person_movies = build_csr(star_people, star_movies, num_people)
+    movie_offsets, movie_people = build_csr(star_movies, star_people, num_movies)
+    del star_people, star_movies
+    timings["csr"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graph = Graph(*people, *movies, person_offsets, person_movies, movie_offsets, movie_people)
+    timings["orders"] = time.perf_counter() - start
+    graph.timings = timings
+    return graph
@@ -0,0 +1,174 @@
+import json
+import math
+import random
+import struct
+from array import array
+from collections import deque
+
+UNREACHED = -1
+MAGIC = b"DEGLMK\0\0"
+HEADER = struct.Struct("<8sII")
+
+
+def distances_from(source, num_people, neighbors_for):
+    """
+    Breadth-first distances from `source` to every person, with
+    UNREACHED for people in other components.
+    """
+    distances = array("h", [UNREACHED]) * num_people
+    distances[source] = 0
+    queue = deque([source])
+    while queue:
+        person = queue.popleft()
+        distance = distances[person] + 1
+        for _, neighbor in neighbors_for(person):
+            if distances[neighbor] == UNREACHED:
+                distances[neighbor] = distance
+                queue.append(neighbor)
+    return distances
+
+
+class LandmarkOracle():
+    """
+    Distance bounds between people from BFS distances to `k` landmarks.
+
+    By the triangle inequality, for every landmark l,
+        |d(l, u) - d(l, v)| <= d(u, v) <= d(l, u) + d(l, v)
+    so each query costs O(k) array lookups.
+    """
+
+    def __init__(self, landmarks, distances, fingerprint=None):
+        self.landmarks = landmarks
+        self.distances = distances
+        # The CSV files the distances were computed from, see snapshot.py
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, graph, k, neighbors_for=None, strategy="farthest", seed=0):
+        """
+        Pick `k` landmarks from the compact `graph` and run BFS from each.
+
+        "degree" picks the people with the most movies, "random" picks at
+        random among people with movies, and "farthest" starts from the
+        best connected person and then repeatedly adds whoever is farthest
+        from the landmarks chosen so far.
+        """
+        neighbors_for = neighbors_for or graph.neighbors
+        n = graph.num_people
+        offsets = graph.person_offsets
+        movie_counts = [offsets[p + 1] - offsets[p] for p in range(n)]
+        candidates = [p for p in range(n) if movie_counts[p]]
+        k = min(k, len(candidates))
+
+        if strategy == "degree":
+            landmarks = sorted(candidates, key=lambda p: -movie_counts[p])[:k]
+            distances = [distances_from(p, n, neighbors_for) for p in landmarks]
+        elif strategy == "random":
+            landmarks = random.Random(seed).sample(candidates, k)
+            distances = [distances_from(p, n, neighbors_for) for p in landmarks]
+        elif strategy == "farthest":
+            landmarks, distances = [], []
+            nearest = array("h", [UNREACHED]) * n
+            landmark = max(candidates, key=lambda p: movie_counts[p])
+            while len(landmarks) < k:
+                landmarks.append(landmark)
+                distances.append(distances_from(landmark, n, neighbors_for))
+                for p, distance in enumerate(distances[-1]):
+                    if distance != UNREACHED and (nearest[p] == UNREACHED or distance < nearest[p]):
+                        nearest[p] = distance
+
+                # Prefer a component no landmark reaches yet, then the farthest person
+                unreached = [p for p in candidates if nearest[p] == UNREACHED]
+                if unreached:
+                    landmark = max(unreached, key=lambda p: movie_counts[p])
+                else:
+                    landmark = max(candidates, key=lambda p: nearest[p])
+        else:
+            raise ValueError(f"unknown landmark strategy: {strategy}")
+        return cls(landmarks, distances)
+
+    def bounds(self, u, v):
+        """
+        Return (lower, upper) bounds on the distance between people `u`
+        and `v`. `lower` is math.inf when they are known to be in different
+        components, and `upper` is None when no landmark reaches both.
+        """
+        lower, upper = 0, None
+        for distances in self.distances:
+            du, dv = distances[u], distances[v]
+            if du == UNREACHED and dv == UNREACHED:
+                continue
+            if du == UNREACHED or dv == UNREACHED:
+                return math.inf, None
+            lower = max(lower, abs(du - dv))
+            if upper is None or du + dv < upper:
+                upper = du + dv
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Return an admissible A* heuristic estimating the distance to `target`.
+        """
+        to_target = [(distances, distances[target]) for distances in self.distances]
+
+        def estimate(person):
+            best = 0
+            for distances, dt in to_target:
+                dp = distances[person]
+                if (dp == UNREACHED) != (dt == UNREACHED):
+                    return math.inf
+                if dp - dt > best:
+                    best = dp - dt
+                elif dt - dp > best:
+                    best = dt - dp
+            return best
+        return estimate
+
+    def nbytes(self):
+        return sum(len(distances) * distances.itemsize for distances in self.distances)
+
+    def save(self, filename):
+        header = json.dumps({"landmarks": self.landmarks, "fingerprint": self.fingerprint}).encode("utf-8")
+        num_people = len(self.distances[0]) if self.distances else 0
+        with open(filename, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(header), num_people))
+            f.write(header)
+            for distances in self.distances:
+                distances.tofile(f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "rb") as f:
+            magic, header_size, num_people = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{filename} is not a landmark file")
+            header = json.loads(f.read(header_size))
+            distances = []
+            for _ in header["landmarks"]:
+                row = array("h")
+                row.fromfile(f, num_people)
+                distances.append(row)
+        return cls(header["landmarks"], distances, header.get("fingerprint"))
+
+
+def load_oracle(path, graph, k, neighbors_for=None, csv_fingerprint=None):
+    """
+    Return the oracle saved at `path` if it has `k` landmarks over the
+    people of `graph` and was built from the CSV files `csv_fingerprint`
+    describes. Otherwise build one and save it to `path`, so only the
+    first run pays for the k breadth-first searches.
+    """
+    try:
+        oracle = LandmarkOracle.load(path)
+        if (len(oracle.landmarks) == k and oracle.fingerprint == csv_fingerprint
+                and all(len(row) == graph.num_people for row in oracle.distances)):
+            return oracle
+    except (OSError, EOFError, ValueError, KeyError, struct.error):
+        pass
+    oracle = LandmarkOracle.build(graph, k, neighbors_for)
+    oracle.fingerprint = csv_fingerprint
+    try:
+        oracle.save(path)
+    except OSError:
+        pass  # Unwritable location: the oracle is rebuilt next time
+    return oracle
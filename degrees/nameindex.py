@@ -0,0 +1,274 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from graph import surname_key
+
+# Sorts after every character a name can contain
+HIGHEST = "\U0010ffff"
+
+# Letters of a word that fuzzy candidates must share with the query
+PREFIX_LENGTH = 4
+
+# Edits the segment index answers; larger distances scan prefix windows
+SEGMENT_DISTANCE = 2
+
+# Occurrences of each character told apart by signatures, and their width
+SIGNATURE_OCCURRENCES = 4
+SIGNATURE_BITS = 127
+SIGNATURE_STRIDE = 37
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance between `a` and `b`, or `limit + 1` as soon as
+    it is known to exceed `limit`. Only cells within `limit` of the
+    diagonal are computed.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    # A shared prefix never changes the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    a, b = a[start:], b[start:]
+    beyond = limit + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i if i <= limit else beyond] + [beyond] * len(b)
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        char = a[i - 1]
+        best = current[0]
+        for j in range(lo, hi + 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != b[j - 1]))
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return beyond
+        previous = current
+    return min(previous[-1], beyond)
+
+
+def segments(length, pieces):
+    """
+    Return the (start, length) of each of `pieces` even segments of a
+    string of `length` characters, the longer segments last.
+    """
+    short, extra = divmod(length, pieces)
+    bounds = [0]
+    for i in range(pieces):
+        bounds.append(bounds[-1] + short + (i >= pieces - extra))
+    return [(bounds[i], bounds[i + 1] - bounds[i]) for i in range(pieces)]
+
+
+def signature(key):
+    """
+    Return a bit mask with a bit for each (character, occurrence) pair
+    of `key`, up to SIGNATURE_OCCURRENCES of each character. One edit
+    adds or removes at most one pair each way, so keys within k edits
+    differ in at most 2k bits.
+    """
+    seen = {}
+    mask = 0
+    for char in key:
+        count = seen.get(char, 0)
+        if count < SIGNATURE_OCCURRENCES:
+            seen[char] = count + 1
+            mask |= 1 << ((ord(char) * SIGNATURE_OCCURRENCES + count) * SIGNATURE_STRIDE % SIGNATURE_BITS)
+    return mask
+
+
+class SegmentIndex():
+    """
+    Candidate generation for keys within `distance` edits (pass-join).
+
+    Each key is cut into distance + 1 segments, so any string within
+    `distance` edits contains at least one segment unchanged and near
+    its original position. The index keeps the hash of every (length,
+    segment number, segment) with its key's position, sorted, and a
+    lookup only probes the substrings of the query that could be such a
+    segment. Candidates are then checked against the query's signature.
+    """
+
+    def __init__(self, keys, distance=SEGMENT_DISTANCE):
+        self.distance = distance
+        hashes, positions = array("q"), array("l")
+        self.signatures = []
+        for position, key in enumerate(keys):
+            for i, (start, length) in enumerate(segments(len(key), distance + 1)):
+                hashes.append(hash((len(key), i, key[start:start + length])))
+                positions.append(position)
+            self.signatures.append(signature(key))
+        order = sorted(range(len(hashes)), key=hashes.__getitem__)
+        self.hashes = array("q", (hashes[i] for i in order))
+        self.positions = array("l", (positions[i] for i in order))
+
+    def candidates(self, query, max_distance):
+        """
+        Return the positions of keys that may be within `max_distance`
+        (at most `distance`) edits of `query`, without duplicates.
+        """
+        tau = self.distance
+        mask = signature(query)
+        found = set()
+        for length in range(max(0, len(query) - max_distance), len(query) + max_distance + 1):
+            delta = len(query) - length
+            for i, (start, size) in enumerate(segments(length, tau + 1)):
+                # Only where a first unchanged segment can start (multi-match-aware bounds)
+                lo = max(start - i, start + delta - (tau - i), 0)
+                hi = min(start + i, start + delta + (tau - i), len(query) - size)
+                for at in range(lo, hi + 1):
+                    probe = hash((length, i, query[at:at + size]))
+                    first = bisect_left(self.hashes, probe)
+                    found.update(self.positions[first:bisect_right(self.hashes, probe, lo=first)])
+        return [
+            position for position in found
+            if (self.signatures[position] ^ mask).bit_count() <= 2 * max_distance
+        ]
+
+
+class NameIndex():
+    """
+    People sorted by lowercase name, for exact, prefix and fuzzy lookup
+    by binary search.
+
+    `order` lists rows in name order, `surname_order` lists them by
+    last word first, and `name_of`, `id_of` and `birth_of` read a row's
+    name, IMDb id and birth year.
+    """
+
+    def __init__(self, order, surname_order, name_of, id_of, birth_of, keys=None):
+        self.order = order
+        self.surname_order = surname_order
+        self.name_of = name_of
+        self.id_of = id_of
+        self.birth_of = birth_of
+        self.keys = keys
+        self.positions = range(len(order))
+        self.segment_index = None
+
+    @classmethod
+    def from_people(cls, people):
+        """
+        Build an index over the `people` dict of degrees.py.
+        """
+        order = sorted(people, key=lambda person_id: people[person_id]["name"].lower())
+        return cls(
+            order,
+            sorted(people, key=lambda person_id: surname_key(people[person_id]["name"])),
+            lambda person_id: people[person_id]["name"],
+            lambda person_id: person_id,
+            lambda person_id: people[person_id]["birth"],
+            keys=[people[person_id]["name"].lower() for person_id in order]
+        )
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Build an index over a compact graph, reusing its name order.
+        """
+        return cls(
+            graph.name_order,
+            graph.surname_order,
+            graph.person_names.__getitem__,
+            graph.person_ids.__getitem__,
+            graph.person_births.__getitem__
+        )
+
+    def key(self, position):
+        if self.keys is not None:
+            return self.keys[position]
+        return self.name_of(self.order[position]).lower()
+
+    def span(self, prefix, key=None):
+        """
+        Return the range of positions whose key starts with `prefix`.
+        """
+        key = key or self.key
+        lo = bisect_left(self.positions, prefix, key=key)
+        hi = bisect_left(self.positions, prefix + HIGHEST, lo=lo, key=key)
+        return range(lo, hi)
+
+    def exact(self, name, birth=None):
+        """
+        Return the ids of people named `name` (ignoring case), keeping
+        only those born in `birth` if it is given.
+        """
+        name = name.lower()
+        lo = bisect_left(self.positions, name, key=self.key)
+        matches = []
+        for position in range(lo, len(self.order)):
+            if self.key(position) != name:
+                break
+            row = self.order[position]
+            if birth is None or self.birth_of(row) == str(birth):
+                matches.append(self.id_of(row))
+        return matches
+
+    def prefix(self, prefix, limit=10):
+        """
+        Return up to `limit` (name, id) pairs whose name starts with `prefix`.
+        """
+        span = self.span(prefix.lower())
+        return [
+            (self.name_of(self.order[position]), self.id_of(self.order[position]))
+            for position in span[:limit]
+        ]
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Return up to `limit` (distance, name, id) triples for names within
+        `max_distance` edits of `name`, closest first.
+
+        Up to SEGMENT_DISTANCE edits, candidates come from the segment
+        index and every name within the distance is found. Beyond that,
+        candidates are the people sharing the start of the first word of
+        the name, plus those sharing the start of its last word. Those two
+        stretches do not overlap, so in multi-word names a single typo
+        always leaves one of the two windows intact.
+        """
+        name = name.lower()
+        words = name.split()
+        if not words:
+            return []
+        if max_distance <= SEGMENT_DISTANCE:
+            return self.segment_fuzzy(name, max_distance, limit)
+
+        def surname_of(position):
+            return surname_key(self.name_of(self.surname_order[position]))
+
+        if len(words) == 1:
+            windows = [(self.order, self.span(name[:2]))]
+        else:
+            windows = [
+                (self.order, self.span(name[:min(PREFIX_LENGTH, len(words[0]))])),
+                (self.surname_order, self.span(surname_key(name)[:min(PREFIX_LENGTH, len(words[-1]))],
+                                               key=surname_of))
+            ]
+
+        matches = {}
+        for order, span in windows:
+            for position in span:
+                row = order[position]
+                candidate = self.name_of(row)
+                if abs(len(candidate) - len(name)) > max_distance:
+                    continue
+                distance = edit_distance(name, candidate.lower(), max_distance)
+                if distance <= max_distance:
+                    matches[self.id_of(row)] = (distance, candidate, self.id_of(row))
+        return sorted(matches.values())[:limit]
+
+    def segment_fuzzy(self, name, max_distance, limit):
+        """
+        Answer `fuzzy` from the segment index, built on first use.
+        """
+        if self.segment_index is None:
+            self.segment_index = SegmentIndex([self.key(position) for position in self.positions])
+        matches = []
+        for position in self.segment_index.candidates(name, max_distance):
+            distance = edit_distance(name, self.key(position), max_distance)
+            if distance <= max_distance:
+                row = self.order[position]
+                matches.append((distance, self.name_of(row), self.id_of(row)))
+        return sorted(matches)[:limit]
@@ -0,0 +1,199 @@
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+from batch import resolve_person
+from costars import MODES
+
+
+class PathCache():
+    """
+    Thread-safe LRU cache of shortest paths keyed by (source, target).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return (found, path) for `key`, marking it as recently used.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, path):
+        with self.lock:
+            self.entries[key] = path
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+
+class LatencyMetrics():
+    """
+    Per-request latencies, keeping the most recent `window` for percentiles.
+    """
+
+    def __init__(self, window=10000):
+        self.recent = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds):
+        with self.lock:
+            self.recent.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def summary(self):
+        with self.lock:
+            recent = sorted(self.recent)
+            count, total = self.count, self.total
+        summary = {"requests": count, "mean_ms": total / count * 1000 if count else None}
+        for percentile in (50, 95, 99):
+            key = f"p{percentile}_ms"
+            if recent:
+                summary[key] = recent[min(len(recent) - 1, len(recent) * percentile // 100)] * 1000
+            else:
+                summary[key] = None
+        return summary
+
+
+def describe_path(source_id, path):
+    """
+    Expand a (movie_id, person_id) path with names and titles.
+    """
+    steps = []
+    previous = source_id
+    for movie_id, person_id in path:
+        steps.append({
+            "from": degrees.person_record(previous)["name"],
+            "to": degrees.person_record(person_id)["name"],
+            "person_id": person_id,
+            "movie_id": movie_id,
+            "movie": degrees.movie_record(movie_id)["title"]
+        })
+        previous = person_id
+    return steps
+
+
+class DegreesHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /path?source=...&target=..., GET /metrics and GET /health.
+    """
+
+    server_version = "degrees/1"
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        if url.path == "/path":
+            status, body = self.shortest_path(parse_qs(url.query))
+        elif url.path == "/metrics":
+            status, body = 200, dict(self.server.metrics.summary(),
+                                     cache_hits=self.server.cache.hits,
+                                     cache_misses=self.server.cache.misses,
+                                     cache_entries=len(self.server.cache.entries))
+        elif url.path == "/health":
+            status, body = 200, {"status": "ok"}
+        else:
+            status, body = 404, {"error": "not found"}
+
+        latency = time.perf_counter() - start
+        if url.path == "/path":
+            self.server.metrics.record(latency)
+            body["latency_ms"] = latency * 1000
+        self.send_json(status, body)
+
+    def shortest_path(self, query):
+        source = query.get("source", [None])[0]
+        target = query.get("target", [None])[0]
+        if source is None or target is None:
+            return 400, {"error": "source and target are required"}
+        source_id, target_id = resolve_person(source), resolve_person(target)
+        if source_id is None or target_id is None:
+            missing = source if source_id is None else target
+            return 404, {"error": f"person not found or ambiguous: {missing}"}
+
+        key = (source_id, target_id)
+        cached, path = self.server.cache.get(key)
+        if not cached:
+            path = degrees.shortest_path(source_id, target_id, bidirectional=True)
+            self.server.cache.put(key, path)
+        return 200, {
+            "source": source_id,
+            "target": target_id,
+            "degrees": None if path is None else len(path),
+            "path": None if path is None else describe_path(source_id, path),
+            "cached": cached
+        }
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(port, cache_size=10000, quiet=False):
+    """
+    Create a local server for the data degrees.py has already loaded.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), DegreesHandler)
+    server.daemon_threads = True
+    server.cache = PathCache(cache_size)
+    server.metrics = LatencyMetrics()
+    server.quiet = quiet
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees of separation queries on localhost")
+    parser.add_argument("directory", nargs="?", default="src/large")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--compact", action="store_true",
+                        help="load the data into a compact integer-indexed graph")
+    parser.add_argument("--index", choices=MODES, default="off",
+                        help="co-star index used to expand people during search")
+    parser.add_argument("--path-cache", type=int, default=10000,
+                        help="number of shortest paths kept in the result cache")
+    parser.add_argument("--quiet", action="store_true", help="do not log each request")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=args.compact, index=args.index)
+    print("Data loaded.")
+
+    server = make_server(args.port, args.path_cache, args.quiet)
+    print(f"Serving on http://127.0.0.1:{args.port}/path?source=...&target=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import json
+import mmap
+import os
+import struct
+
+from graph import Graph, StringTable
+from ingest import load_csv
+
+# Bump whenever the layout of the snapshot file changes
+SNAPSHOT_VERSION = 2
+SNAPSHOT_NAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP\0"
+HEADER = struct.Struct("<8sII")
+
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+STRING_TABLES = ("person_ids", "person_names", "person_births", "movie_ids", "movie_titles", "movie_years")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people",
+          "person_order", "movie_order", "name_order", "surname_order")
+
+
+def fingerprint(directory):
+    """
+    Return the (name, mtime, size) of each CSV file in `directory`,
+    used to tell whether a snapshot is still current.
+    """
+    result = []
+    for name in CSV_FILES:
+        stat = os.stat(os.path.join(directory, name))
+        result.append([name, stat.st_mtime_ns, stat.st_size])
+    return result
+
+
+def load_graph(directory, use_snapshot=True, workers=None):
+    """
+    Return the compact graph for `directory`.
+
+    The graph is mapped from the directory's snapshot when one exists for
+    the current CSV files; otherwise it is parsed from the CSVs and a new
+    snapshot is written for the next run. With `workers`, the CSVs are
+    parsed in chunks by that many processes.
+    """
+    def parse():
+        return Graph.from_csv(directory) if workers is None else load_csv(directory, workers)
+
+    if not use_snapshot:
+        return parse()
+
+    path = os.path.join(directory, SNAPSHOT_NAME)
+    current = fingerprint(directory)
+    graph = read_snapshot(path, current)
+    if graph is None:
+        graph = parse()
+        try:
+            write_snapshot(graph, path, current)
+        except OSError:
+            pass  # A read-only data directory just means no cache
+    return graph
+
+
+def write_snapshot(graph, path, csv_fingerprint):
+    """
+    Write `graph` to `path`, atomically replacing any older snapshot.
+    """
+    sections = []
+    for name in STRING_TABLES:
+        table = getattr(graph, name)
+        sections.append((f"{name}.blob", "B", table.blob))
+        sections.append((f"{name}.offsets", "q", table.offsets))
+    for name in ARRAYS:
+        values = getattr(graph, name)
+        sections.append((name, values.format if isinstance(values, memoryview) else values.typecode, values))
+
+    # Lay sections out after the header, each aligned to 8 bytes
+    contents = {}
+    position = 0
+    for name, typecode, values in sections:
+        size = memoryview(values).nbytes
+        contents[name] = [position, size, typecode]
+        position += align(size)
+    toc = json.dumps({"fingerprint": csv_fingerprint, "sections": contents}).encode("utf-8")
+    start = align(HEADER.size + len(toc))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(toc)))
+        f.write(toc)
+        f.write(bytes(start - HEADER.size - len(toc)))
+        for name, typecode, values in sections:
+            data = memoryview(values).cast("B")
+            f.write(data)
+            f.write(bytes(align(data.nbytes) - data.nbytes))
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, csv_fingerprint):
+    """
+    Map the snapshot at `path` as a graph, or return None if it is
+    missing, from another version, or stale for `csv_fingerprint`.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    view = memoryview(mapped)
+    if len(view) < HEADER.size:
+        return None
+    magic, version, toc_size = HEADER.unpack_from(view)
+    if magic != MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    toc = json.loads(bytes(view[HEADER.size:HEADER.size + toc_size]))
+    if toc["fingerprint"] != csv_fingerprint:
+        return None
+
+    start = align(HEADER.size + toc_size)
+
+    def section(name):
+        offset, size, typecode = toc["sections"][name]
+        return view[start + offset:start + offset + size].cast(typecode)
+
+    tables = [StringTable(section(f"{name}.blob"), section(f"{name}.offsets")) for name in STRING_TABLES]
+    arrays = [section(name) for name in ARRAYS]
+    return Graph(*tables, *arrays)
+
+
+def align(size):
+    return (size + 7) & ~7
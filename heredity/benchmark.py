@@ -0,0 +1,224 @@
+import argparse
+import glob
+import random
+import time
+
+import elimination
+import junction
+import sampling
+import vectorized
+import numpy as np
+
+from heredity import enumerate_probabilities, load_data
+
+
+def synthetic_family(num_people, observed=0.5, seed=0):
+    """
+    Generate a pedigree of about `num_people` people in load_data's format.
+
+    Each generation pairs people from the one before, some with spouses
+    who marry in (new founders) and some with distant relatives, which
+    adds loops as real pedigrees have. Couples have one to three
+    children. A fraction `observed` of people have a known trait.
+    """
+    rng = random.Random(seed)
+    people = {}
+
+    def add(mother=None, father=None):
+        name = f"P{len(people)}"
+        trait = rng.choice((True, False)) if rng.random() < observed else None
+        people[name] = {"name": name, "mother": mother, "father": father, "trait": trait}
+        return name
+
+    generation = [add() for _ in range(min(4, num_people))]
+    while len(people) < num_people:
+        rng.shuffle(generation)
+        children = []
+        for i, person in enumerate(generation):
+            if len(people) >= num_people:
+                break
+            if i % 2 and rng.random() < 0.3:
+                spouse = generation[i - 1]
+            else:
+                spouse = add()
+            for _ in range(rng.randint(1, 3)):
+                if len(people) < num_people:
+                    children.append(add(person, spouse))
+        generation = children or [add() for _ in range(2)]
+    return people
+
+
+def max_difference(a, b):
+    return max(
+        abs(a[person][field][value] - b[person][field][value])
+        for person in a for field in a[person] for value in a[person][field]
+    )
+
+
+def bench_elimination(args):
+    """
+    Time variable elimination on synthetic pedigrees, checking it
+    against enumeration where that is still feasible.
+    """
+    print(f"{'people':>7} {'seconds':>8} {'max width':>9} {'vs enumeration':>15}")
+    for size in args.sizes:
+        people = synthetic_family(size, seed=args.seed)
+        factors = elimination.family_factors(people)
+        width = elimination.induced_width(factors, elimination.min_fill_order(factors))
+
+        start = time.perf_counter()
+        probabilities = elimination.infer(people)
+        elapsed = time.perf_counter() - start
+
+        check = ""
+        if size <= args.check:
+            check = f"{max_difference(probabilities, enumerate_probabilities(people)):.1e}"
+        print(f"{size:>7} {elapsed:>8.3f} {width:>9} {check:>15}")
+
+
+def bench_enumeration(args):
+    """
+    Time exact enumeration on synthetic pedigrees against variable
+    elimination.
+    """
+    print(f"{'people':>7} {'enumerate s':>12} {'eliminate s':>12} {'max difference':>15}")
+    for size in args.sizes:
+        people = synthetic_family(size, seed=args.seed)
+        start = time.perf_counter()
+        enumerated = enumerate_probabilities(people)
+        enumerate_time = time.perf_counter() - start
+        start = time.perf_counter()
+        eliminated = elimination.infer(people)
+        eliminate_time = time.perf_counter() - start
+        print(f"{size:>7} {enumerate_time:>12.3f} {eliminate_time:>12.3f} "
+              f"{max_difference(enumerated, eliminated):>15.1e}")
+
+
+def bench_vectorized(args):
+    """
+    Time the vectorized joint over all 3^n assignments against
+    enumeration, and check it against variable elimination.
+    """
+    print(f"{'people':>7} {'assignments':>12} {'vectorized s':>13} {'enumerate s':>12} {'max difference':>15}")
+    for size in args.sizes:
+        people = synthetic_family(size, seed=args.seed)
+        start = time.perf_counter()
+        probabilities = vectorized.infer(people)
+        vectorized_time = time.perf_counter() - start
+        enumerate_time = ""
+        if size <= args.enumerate:
+            start = time.perf_counter()
+            enumerate_probabilities(people)
+            enumerate_time = f"{time.perf_counter() - start:.3f}"
+        difference = max_difference(probabilities, elimination.infer(people))
+        print(f"{size:>7} {3 ** size:>12} {vectorized_time:>13.3f} {enumerate_time:>12} {difference:>15.1e}")
+
+
+def bench_junction(args):
+    """
+    Time compiling a junction tree, its first query, and repeated
+    queries that each change one person's trait, against variable
+    elimination from scratch.
+    """
+    print(f"{'people':>7} {'cliques':>8} {'maximal':>8} {'width':>6} {'compile s':>10} {'first ms':>9} "
+          f"{'update ms':>10} {'eliminate s':>12} {'max difference':>15}")
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        people = synthetic_family(size, seed=args.seed)
+        junction.compile_structure.cache_clear()
+
+        start = time.perf_counter()
+        tree = junction.compiled(people)
+        compile_time = time.perf_counter() - start
+        start = time.perf_counter()
+        junction.infer(people)
+        first_time = time.perf_counter() - start
+
+        names = list(people)
+        update_time = 0
+        for _ in range(args.updates):
+            person = rng.choice(names)
+            people[person]["trait"] = rng.choice([True, False, None])
+            start = time.perf_counter()
+            probabilities = junction.infer(people)
+            update_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        eliminated = elimination.infer(people)
+        eliminate_time = time.perf_counter() - start
+        width = max(len(clique) for clique in tree.cliques)
+        # A clique inside another would only add messages to each propagation
+        maximal = not any(set(a) < set(b) for a in tree.cliques for b in tree.cliques)
+        print(f"{size:>7} {len(tree.cliques):>8} {str(maximal):>8} {width:>6} {compile_time:>10.3f} "
+              f"{first_time * 1000:>9.1f} "
+              f"{update_time / args.updates * 1000:>10.1f} {eliminate_time:>12.3f} "
+              f"{max_difference(probabilities, eliminated):>15.1e}")
+
+
+def bench_sampling(args):
+    """
+    Run both Monte Carlo methods on the bundled families and synthetic
+    pedigrees, and check their estimates against variable elimination:
+    with honest standard errors about 95% of entries fall within two.
+    """
+    families = [(path, load_data(path)) for path in sorted(glob.glob(args.data))]
+    families += [(f"synthetic {size}", synthetic_family(size, seed=args.seed)) for size in args.sizes]
+    print(f"{'pedigree':>20} {'method':>10} {'seconds':>8} {'samples':>9} {'ess':>7} "
+          f"{'max error':>10} {'max error/se':>13} {'within 2 se':>12}")
+    for name, people in families:
+        exact = elimination.infer(people)
+        for method in args.methods:
+            start = time.perf_counter()
+            estimate = sampling.estimate(people, method, min_ess=args.min_ess, max_samples=args.max_samples,
+                                         processes=args.processes, seed=args.seed)
+            elapsed = time.perf_counter() - start
+            truth = np.array([[exact[person]["gene"][genes] for genes in elimination.GENES]
+                              for person in estimate.names])
+            errors = np.abs(estimate.marginals - truth)
+            scores = errors / np.maximum(estimate.standard_errors, 1e-300)
+            print(f"{name:>20} {method:>10} {elapsed:>8.2f} {estimate.samples:>9} {estimate.ess:>7.0f} "
+                  f"{errors.max():>10.4f} {scores.max():>13.1f} {np.mean(scores <= 2):>12.1%}"
+                  f"{'' if estimate.converged else '  (not converged)'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for heredity inference")
+    parser.add_argument("--seed", type=int, default=0)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    eliminate = subparsers.add_parser("elimination", help="variable elimination on synthetic pedigrees")
+    eliminate.add_argument("--sizes", type=int, nargs="+", default=[5, 7, 25, 100, 300])
+    eliminate.add_argument("--check", type=int, default=7, metavar="PEOPLE",
+                           help="compare with enumeration up to this many people")
+    eliminate.set_defaults(run=bench_elimination)
+
+    enumerate_ = subparsers.add_parser("enumeration", help="exact enumeration on small pedigrees")
+    enumerate_.add_argument("--sizes", type=int, nargs="+", default=[3, 5, 7, 9, 11])
+    enumerate_.set_defaults(run=bench_enumeration)
+
+    vectorize = subparsers.add_parser("vectorized", help="NumPy joint over every gene assignment")
+    vectorize.add_argument("--sizes", type=int, nargs="+", default=list(range(3, 15)))
+    vectorize.add_argument("--enumerate", type=int, default=10, metavar="PEOPLE",
+                           help="time enumeration up to this many people")
+    vectorize.set_defaults(run=bench_vectorized)
+
+    junction_ = subparsers.add_parser("junction", help="cached junction tree under changing evidence")
+    junction_.add_argument("--sizes", type=int, nargs="+", default=[3, 10, 25, 100, 300])
+    junction_.add_argument("--updates", type=int, default=20, help="single-trait changes to time")
+    junction_.set_defaults(run=bench_junction)
+
+    sample = subparsers.add_parser("sampling", help="Monte Carlo methods against exact marginals")
+    sample.add_argument("--data", default="data/family*.csv", help="glob of pedigree files to include")
+    sample.add_argument("--sizes", type=int, nargs="+", default=[25, 100])
+    sample.add_argument("--methods", nargs="+", default=["weighting", "gibbs"], choices=["weighting", "gibbs"])
+    sample.add_argument("--min-ess", type=float, default=1000)
+    sample.add_argument("--max-samples", type=int, default=10 ** 6)
+    sample.add_argument("--processes", type=int)
+    sample.set_defaults(run=bench_sampling)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
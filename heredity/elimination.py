@@ -0,0 +1,285 @@
+import numpy as np
+
+from heredity import PROBS
+
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    A table over discrete variables: `table` has one axis per name in
+    `variables`, indexed by the variable's value (a gene count 0-2).
+    """
+
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = np.asarray(table, dtype=np.float64)
+
+    def expand(self, variables):
+        """
+        Return the table with axes reordered to follow `variables`, and
+        size 1 along the variables this factor does not mention.
+        """
+        order = [self.variables.index(v) for v in variables if v in self.variables]
+        shape = [3 if v in self.variables else 1 for v in variables]
+        return self.table.transpose(order).reshape(shape)
+
+    def __mul__(self, other):
+        variables = self.variables + tuple(v for v in other.variables if v not in self.variables)
+        return Factor(variables, self.expand(variables) * other.expand(variables))
+
+    def sum_out(self, variable):
+        axis = self.variables.index(variable)
+        return Factor(self.variables[:axis] + self.variables[axis + 1:], self.table.sum(axis=axis))
+
+    def marginal(self, variables):
+        """
+        Sum out every variable not in `variables`.
+        """
+        axes = tuple(i for i, v in enumerate(self.variables) if v not in variables)
+        return Factor(tuple(v for v in self.variables if v in variables), self.table.sum(axis=axes))
+
+
+def inheritance_table():
+    """
+    Return P(child genes | mother genes, father genes) as a 3x3x3 array
+    indexed [mother, father, child].
+    """
+    mutation = PROBS["mutation"]
+
+    # Probability that a parent with 0, 1 or 2 copies passes the gene on
+    passes = np.array([mutation, 0.5, 1 - mutation])
+    mother, father = passes[:, None], passes[None, :]
+    table = np.empty((3, 3, 3))
+    table[:, :, 0] = (1 - mother) * (1 - father)
+    table[:, :, 1] = mother * (1 - father) + (1 - mother) * father
+    table[:, :, 2] = mother * father
+    return table
+
+
+def family_factors(people):
+    """
+    Compile `people` (as returned by load_data) into factors over each
+    person's gene count.
+
+    Every person contributes their gene prior (founders) or inheritance
+    CPT (children). A known trait is evidence on that person's trait
+    variable, which leaves a likelihood factor P(trait | genes) over the
+    genes alone. Unknown traits have no children in the network, so they
+    are left out here and read off the gene marginals afterwards.
+    """
+    factors = inheritance_factors(people)
+    for person, data in people.items():
+        if data["trait"] is not None:
+            factors.append(trait_factor(person, data["trait"]))
+    return factors
+
+
+def inheritance_factors(people):
+    """
+    Return the gene prior or inheritance CPT factor of every person.
+    """
+    prior = np.array([PROBS["gene"][genes] for genes in GENES])
+    inheritance = inheritance_table()
+    factors = []
+    for person, data in people.items():
+        if data["mother"] is None and data["father"] is None:
+            factors.append(Factor((person,), prior))
+        else:
+            factors.append(Factor((data["mother"], data["father"], person), inheritance))
+    return factors
+
+
+def trait_factor(person, trait):
+    """
+    Return the likelihood P(trait | genes) of an observed trait.
+    """
+    return Factor((person,), [PROBS["trait"][genes][trait] for genes in GENES])
+
+
+def interaction_graph(factors):
+    """
+    Return {variable: set of variables sharing a factor with it}.
+    """
+    neighbours = {}
+    for factor in factors:
+        for variable in factor.variables:
+            neighbours.setdefault(variable, set()).update(factor.variables)
+    for variable in neighbours:
+        neighbours[variable].discard(variable)
+    return neighbours
+
+
+def min_fill_order(factors, keep=()):
+    """
+    Return an elimination order for every variable not in `keep`,
+    greedily picking the variable whose elimination adds the fewest new
+    edges between its neighbours (ties broken by fewest neighbours).
+    """
+    neighbours = interaction_graph(factors)
+
+    def fill(variable):
+        adjacent = list(neighbours[variable])
+        return sum(
+            1 for i, a in enumerate(adjacent) for b in adjacent[i + 1:]
+            if b not in neighbours[a]
+        )
+
+    remaining = set(neighbours) - set(keep)
+    order = []
+    while remaining:
+        variable = min(remaining, key=lambda v: (fill(v), len(neighbours[v]), str(v)))
+        adjacent = neighbours.pop(variable)
+        for a in adjacent:
+            neighbours[a].discard(variable)
+            neighbours[a].update(adjacent - {a})
+        remaining.remove(variable)
+        order.append(variable)
+    return order
+
+
+def induced_width(factors, order):
+    """
+    Return the most variables in one product formed when eliminating in
+    `order`; tables grow as 3 to this power.
+    """
+    neighbours = interaction_graph(factors)
+    width = 1
+    for variable in order:
+        adjacent = neighbours.pop(variable)
+        width = max(width, len(adjacent) + 1)
+        for a in adjacent:
+            neighbours[a].discard(variable)
+            neighbours[a].update(adjacent - {a})
+    return width
+
+
+def eliminate(factors, order):
+    """
+    Sum `order`'s variables out of the product of `factors`, one at a
+    time, and return the remaining factors.
+
+    Each new factor is rescaled to a maximum of 1, which does not change
+    normalized marginals but keeps large pedigrees from underflowing.
+    """
+    factors = list(factors)
+    for variable in order:
+        involved = [factor for factor in factors if variable in factor.variables]
+        if not involved:
+            continue
+        factors = [factor for factor in factors if variable not in factor.variables]
+        product = involved[0]
+        for factor in involved[1:]:
+            product = product * factor
+        summed = product.sum_out(variable)
+        peak = summed.table.max()
+        if peak > 0:
+            summed.table /= peak
+        factors.append(summed)
+    return factors
+
+
+def gene_marginal(factors, person, order=None):
+    """
+    Return P(genes of `person` | evidence) as an array over 0, 1, 2.
+    `order` is an elimination order for the other variables (min-fill
+    by default).
+    """
+    if order is None:
+        order = min_fill_order(factors, keep=(person,))
+    result = Factor((person,), np.ones(3))
+    for factor in eliminate(factors, [v for v in order if v != person]):
+        result = result * factor
+    return result.table / result.table.sum()
+
+
+def distributions(people, gene_marginals):
+    """
+    Turn {person: P(genes) array} into heredity.py's nested dict of
+    gene and trait distributions. An observed trait is certain; an
+    unknown one is P(trait | genes) averaged over the gene marginal.
+    """
+    probabilities = {}
+    for person, data in people.items():
+        genes = gene_marginals[person]
+        if data["trait"] is None:
+            has_trait = sum(genes[g] * PROBS["trait"][g][True] for g in GENES)
+        else:
+            has_trait = 1.0 if data["trait"] else 0.0
+        probabilities[person] = {
+            "gene": {2: float(genes[2]), 1: float(genes[1]), 0: float(genes[0])},
+            "trait": {True: float(has_trait), False: float(1 - has_trait)}
+        }
+    return probabilities
+
+
+def marginals(factors, order=None):
+    """
+    Return {variable: P(variable | evidence)} for every variable in
+    `factors` from two passes over the bucket tree of `order` (min-fill
+    by default), instead of one elimination per variable.
+
+    Each factor goes in the bucket of its first variable in `order`.
+    Collecting, bucket i multiplies its factors and its children's
+    messages, sums out its variable and sends the result to the bucket
+    of the earliest variable left. Distributing, each bucket sends every
+    child the product of everything else it holds, summed down to that
+    child's message variables. A bucket's full product then holds the
+    joint of its variable with the evidence.
+    """
+    if order is None:
+        order = min_fill_order(factors)
+    position = {variable: i for i, variable in enumerate(order)}
+    local = [Factor((variable,), np.ones(3)) for variable in order]
+    for factor in factors:
+        first = min(position[v] for v in factor.variables)
+        local[first] = local[first] * factor
+
+    parent = [None] * len(order)
+    children = [[] for _ in order]
+    upward = []
+    for i, variable in enumerate(order):
+        product = local[i]
+        for child in children[i]:
+            product = product * upward[child]
+        upward.append(rescaled(product.sum_out(variable)))
+        if upward[i].variables:
+            parent[i] = min(position[v] for v in upward[i].variables)
+            children[parent[i]].append(i)
+
+    downward = [None] * len(order)
+    result = {}
+    for i in reversed(range(len(order))):
+        product = local[i] if parent[i] is None else local[i] * downward[i]
+        incoming = [upward[child] for child in children[i]]
+        belief = product
+        for message in incoming:
+            belief = belief * message
+        genes = belief.marginal((order[i],)).table
+        result[order[i]] = genes / genes.sum()
+        for k, child in enumerate(children[i]):
+            message = product
+            for other in incoming[:k] + incoming[k + 1:]:
+                message = message * other
+            downward[child] = rescaled(message.marginal(upward[child].variables))
+    return result
+
+
+def rescaled(factor):
+    """
+    Scale `factor` to a maximum of 1 in place, as `eliminate` does.
+    """
+    peak = factor.table.max()
+    if peak > 0:
+        factor.table /= peak
+    return factor
+
+
+def infer(people):
+    """
+    Compute the distributions by variable elimination. One min-fill
+    order is computed for the whole family, and every person's marginal
+    comes out of the same collect and distribute pass.
+    """
+    factors = family_factors(people)
+    return distributions(people, marginals(factors, min_fill_order(factors)))
@@ -1,4 +1,5 @@
 import csv
+import importlib
 import itertools
 import sys
 
@@ -40,9 +41,38 @@ PROBS = {
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in (2, 3) or sys.argv[2:] and sys.argv[2] not in METHODS:
+        sys.exit(f"Usage: python heredity.py data.csv [{'|'.join(METHODS)}]")
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) == 3 else "enumeration"
+
+    # Compute gene and trait probabilities for each person
+    module, arguments = METHODS[method]
+    if module is None:
+        probabilities = enumerate_probabilities(people)
+    else:
+        probabilities = importlib.import_module(module).infer(people, *arguments)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def enumerate_probabilities(people):
+    """
+    Return gene and trait distributions for each person by summing the
+    joint probability of every gene assignment consistent with the evidence.
+
+    Observed traits are fixed as evidence rather than enumerated, and an
+    unknown trait is summed out on the spot: it has no children, so each
+    assignment adds p * P(trait | genes) to that person's trait
+    distribution instead of branching on it.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -60,38 +90,92 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
-
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
-
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
-
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    for genes, p in gene_assignments(people, topological_order(people)):
+        for person, num_genes in genes.items():
+            probabilities[person]["gene"][num_genes] += p
+            trait = people[person]["trait"]
+            if trait is None:  # Spread p over both trait values
+                has_trait = PROBS["trait"][num_genes][True]
+                probabilities[person]["trait"][True] += p * has_trait
+                probabilities[person]["trait"][False] += p * (1 - has_trait)
+            else:
+                probabilities[person]["trait"][trait] += p
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
+
+
+def topological_order(people):
+    """
+    Return the names in `people` ordered so parents come before children.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        if person in placed:
+            return
+        placed.add(person)
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent is not None:
+                place(parent)
+        order.append(person)
 
-    # Print results
     for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+        place(person)
+    return order
+
+
+def gene_probability(people, person, num_genes, genes):
+    """
+    Return the probability that `person` has `num_genes` copies of the
+    gene, given the gene counts of their parents in `genes`.
+    """
+    mother = people[person]["mother"]
+    father = people[person]["father"]
+    if mother is None and father is None:
+        return PROBS["gene"][num_genes]
+
+    # Probability each parent passes on a copy, by the parent's gene count
+    passes = {2: 1 - PROBS["mutation"], 1: 0.5, 0: PROBS["mutation"]}
+    from_mother, from_father = passes[genes[mother]], passes[genes[father]]
+    if num_genes == 2:
+        return from_mother * from_father
+    if num_genes == 1:
+        return from_mother * (1 - from_father) + (1 - from_mother) * from_father
+    return (1 - from_mother) * (1 - from_father)
+
+
+def gene_assignments(people, order):
+    """
+    Generate (genes, probability) for every assignment of 0, 1 or 2
+    copies of the gene to each person, with the probability of the
+    assignment and the observed traits.
+
+    People are assigned along `order` (parents first), and the
+    probability is extended one person at a time, so assignments sharing
+    a prefix share its product. Prefixes with probability zero are
+    skipped. The yielded `genes` dict is reused; read it before resuming.
+    """
+    genes = {}
+
+    def extend(position, probability):
+        if position == len(order):
+            yield genes, probability
+            return
+        person = order[position]
+        trait = people[person]["trait"]
+        for num_genes in (0, 1, 2):
+            p = probability * gene_probability(people, person, num_genes, genes)
+            if trait is not None:
+                p *= PROBS["trait"][num_genes][trait]
+            if p > 0:
+                genes[person] = num_genes
+                yield from extend(position + 1, p)
+        genes.pop(person, None)
+
+    return extend(0, 1.0)
 
 
 def load_data(filename):
@@ -217,5 +301,18 @@ def normalize(probabilities):
                 probabilities[person][x][value] /= tot
 
 
+# Inference methods selectable from the command line, as (module, extra
+# arguments) for the module's infer(people, ...); None is enumeration here.
+# The modules import PROBS from this file, so they are imported on demand.
+METHODS = {
+    "enumeration": (None, ()),
+    "elimination": ("elimination", ()),
+    "vectorized": ("vectorized", ()),
+    "junction": ("junction", ()),
+    "weighting": ("sampling", ("weighting",)),
+    "gibbs": ("sampling", ("gibbs",))
+}
+
+
 if __name__ == "__main__":
     main()
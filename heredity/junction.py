@@ -0,0 +1,210 @@
+from functools import lru_cache
+
+import numpy as np
+
+from elimination import Factor, distributions, inheritance_factors, interaction_graph, min_fill_order, trait_factor
+
+# Compiled pedigrees kept by `compiled`
+CACHE_SIZE = 32
+
+
+class JunctionTree():
+    """
+    A clique tree compiled from a pedigree's inheritance structure.
+
+    Cliques come from triangulating the gene variables in min-fill order,
+    each person's prior or inheritance CPT is multiplied into one clique,
+    and each person has a home clique where trait evidence enters.
+    Messages between cliques are kept after a query, so a query with
+    different evidence only recomputes the messages leaving the part of
+    the tree where evidence changed.
+    """
+
+    def __init__(self, people):
+        factors = inheritance_factors(people)
+        self.cliques = triangulate(factors)
+        self.neighbours = spanning_tree(self.cliques)
+
+        # Base potentials: every CPT goes into the first clique covering it
+        self.potentials = [Factor(clique, np.ones((3,) * len(clique))) for clique in self.cliques]
+        for factor in factors:
+            home = next(i for i, clique in enumerate(self.cliques) if set(factor.variables) <= set(clique))
+            self.potentials[home] = self.potentials[home] * factor
+        self.home = {
+            person: min((i for i, clique in enumerate(self.cliques) if person in clique),
+                        key=lambda i: len(self.cliques[i]))
+            for person in people
+        }
+
+        # Cliques on the sending side of each directed edge, rooted at clique 0
+        self.side = {}
+        parent, order = {0: None}, [0]
+        for i in order:
+            for j in self.neighbours[i]:
+                if j not in parent:
+                    parent[j] = i
+                    order.append(j)
+        below = {i: {i} for i in order}
+        for i in reversed(order[1:]):
+            below[parent[i]] |= below[i]
+        everything = set(range(len(self.cliques)))
+        for i in order[1:]:
+            self.side[(i, parent[i])] = below[i]
+            self.side[(parent[i], i)] = everything - below[i]
+
+        # Messages towards the root, leaves first, then back out to the leaves
+        self.schedule = [(i, parent[i]) for i in reversed(order[1:])] + [(parent[i], i) for i in order[1:]]
+
+        self.evidence = {}
+        self.messages = {}
+        self.beliefs = {}
+
+    def propagate(self):
+        """
+        Compute every missing message in schedule order, so the messages
+        a clique needs are always ready before its own. Messages whose
+        sending side has unchanged evidence are kept.
+        """
+        for i, j in self.schedule:
+            if (i, j) in self.messages:
+                continue
+            product = self.potential(i)
+            for k in self.neighbours[i]:
+                if k != j:
+                    product = product * self.messages[(k, i)]
+            message = product.marginal(set(self.cliques[i]) & set(self.cliques[j]))
+            message.table /= message.table.sum()
+            self.messages[(i, j)] = message
+
+    def potential(self, i):
+        """
+        Return clique `i`'s CPT product times the trait evidence it holds.
+        """
+        potential = self.potentials[i]
+        for person, trait in self.evidence.items():
+            if self.home[person] == i:
+                potential = potential * trait_factor(person, trait)
+        return potential
+
+    def observe(self, traits):
+        """
+        Set the observed traits, given as {person: True, False or None},
+        and forget the messages and beliefs the change invalidates.
+        """
+        evidence = {person: trait for person, trait in traits.items() if trait is not None}
+        changed = {self.home[p] for p in evidence.keys() ^ self.evidence.keys()}
+        changed |= {self.home[p] for p in evidence.keys() & self.evidence.keys() if evidence[p] != self.evidence[p]}
+        self.evidence = evidence
+        if not changed:
+            return
+        stale = [edge for edge in self.messages if self.side[edge] & changed]
+        for edge in stale:
+            del self.messages[edge]
+        # A belief is stale if its own evidence or any incoming message changed
+        for i, j in stale:
+            self.beliefs.pop(j, None)
+        for i in changed:
+            self.beliefs.pop(i, None)
+
+    def belief(self, i):
+        """
+        Return clique `i`'s normalized joint with all the evidence.
+        """
+        if i not in self.beliefs:
+            belief = self.potential(i)
+            for k in self.neighbours[i]:
+                belief = belief * self.messages[(k, i)]
+            belief.table /= belief.table.sum()
+            self.beliefs[i] = belief
+        return self.beliefs[i]
+
+    def gene_marginal(self, person):
+        return self.belief(self.home[person]).marginal((person,)).table
+
+    def query(self, traits):
+        """
+        Return {person: P(genes) array} given observed `traits`.
+        """
+        self.observe(traits)
+        self.propagate()
+        return {person: self.gene_marginal(person) for person in self.home}
+
+
+def triangulate(factors):
+    """
+    Return the maximal cliques formed by eliminating the variables of
+    `factors` in min-fill order.
+    """
+    neighbours = interaction_graph(factors)
+    cliques = []
+    for variable in min_fill_order(factors):
+        adjacent = neighbours.pop(variable)
+        cliques.append((variable,) + tuple(sorted(adjacent, key=str)))
+        for a in adjacent:
+            neighbours[a].discard(variable)
+            neighbours[a].update(adjacent - {a})
+    return [
+        clique for i, clique in enumerate(cliques)
+        # No later clique can contain this one's eliminated variable, so
+        # only the earlier ones can swallow it
+        if not any(set(clique) < set(other) for other in cliques[:i])
+    ]
+
+
+def spanning_tree(cliques):
+    """
+    Join `cliques` into a tree that maximizes separator sizes, which
+    gives the running intersection property; unrelated families are
+    joined by empty separators. Returns the neighbour list of each clique.
+    """
+    edges = sorted(
+        ((len(set(a) & set(b)), i, j) for i, a in enumerate(cliques)
+         for j, b in enumerate(cliques[i + 1:], start=i + 1)),
+        reverse=True
+    )
+    component = list(range(len(cliques)))
+
+    def find(i):
+        while component[i] != i:
+            component[i] = component[component[i]]
+            i = component[i]
+        return i
+
+    neighbours = [[] for _ in cliques]
+    for _, i, j in edges:
+        a, b = find(i), find(j)
+        if a != b:
+            component[a] = b
+            neighbours[i].append(j)
+            neighbours[j].append(i)
+    return neighbours
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_structure(structure):
+    """
+    Compile a JunctionTree for a tuple of (person, mother, father).
+    """
+    return JunctionTree({
+        person: {"name": person, "mother": mother, "father": father, "trait": None}
+        for person, mother, father in structure
+    })
+
+
+def compiled(people):
+    """
+    Return the junction tree for the pedigree of `people`, compiling it
+    only the first time a family with that structure is seen.
+    """
+    return compile_structure(tuple(
+        (person, data["mother"], data["father"]) for person, data in people.items()
+    ))
+
+
+def infer(people):
+    """
+    Query the cached junction tree of the pedigree with the traits in
+    `people` as evidence.
+    """
+    tree = compiled(people)
+    return distributions(people, tree.query({person: data["trait"] for person, data in people.items()}))
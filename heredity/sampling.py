@@ -0,0 +1,277 @@
+import multiprocessing
+
+import numpy as np
+
+from heredity import PROBS, topological_order
+from elimination import GENES, distributions, inheritance_table
+
+# Samples (likelihood weighting) or sweeps (Gibbs) each worker adds per round
+ROUND_SAMPLES = 2 ** 14
+ROUND_SWEEPS = 50
+
+# Gibbs chains per worker, and sweeps discarded from each before counting
+CHAINS = 128
+BURN_IN = 100
+
+
+class Pedigree():
+    """
+    A family flattened into arrays for vectorized sampling. People are
+    numbered in topological order, so parents come before children.
+    """
+
+    def __init__(self, people):
+        self.names = topological_order(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        self.mother = [index.get(people[name]["mother"], -1) for name in self.names]
+        self.father = [index.get(people[name]["father"], -1) for name in self.names]
+
+        # Trait evidence as 1/0, or -1 where unknown
+        self.trait = [
+            -1 if people[name]["trait"] is None else int(people[name]["trait"])
+            for name in self.names
+        ]
+
+        # For each person, their children as (child, other parent, is mother)
+        self.children = [[] for _ in self.names]
+        for child in range(len(self.names)):
+            if self.mother[child] >= 0:
+                self.children[self.mother[child]].append((child, self.father[child], True))
+                self.children[self.father[child]].append((child, self.mother[child], False))
+
+        self.prior = np.array([PROBS["gene"][genes] for genes in GENES])
+        self.inheritance = inheritance_table()
+        self.log_prior = np.log(self.prior)
+        self.log_inheritance = np.log(self.inheritance)
+        self.log_trait = np.log([[PROBS["trait"][genes][False], PROBS["trait"][genes][True]] for genes in GENES])
+
+    def __len__(self):
+        return len(self.names)
+
+
+class Estimate():
+    """
+    Monte Carlo gene marginals: `marginals` and `standard_errors` are
+    (people, 3) arrays in the order of `names`. `ess` is the effective
+    sample size the stopping rule compared with its target.
+    """
+
+    def __init__(self, method, names, marginals, standard_errors, ess, samples, converged):
+        self.method = method
+        self.names = names
+        self.marginals = marginals
+        self.standard_errors = standard_errors
+        self.ess = ess
+        self.samples = samples
+        self.converged = converged
+
+    def gene_marginals(self):
+        return dict(zip(self.names, self.marginals))
+
+
+def draw(probabilities, rng):
+    """
+    Draw one gene count per row of `probabilities`, an (rows, 3) array.
+    """
+    cumulative = np.cumsum(probabilities, axis=1)
+    u = rng.random(len(probabilities)) * cumulative[:, -1]
+    return (u[:, None] >= cumulative[:, :-1]).sum(axis=1).astype(np.int8)
+
+
+def forward_sample(pedigree, n, rng):
+    """
+    Sample `n` gene assignments from the prior, parents before children.
+    Returns an (n, people) int8 array.
+    """
+    genes = np.empty((n, len(pedigree)), dtype=np.int8)
+    for j in range(len(pedigree)):
+        if pedigree.mother[j] < 0:
+            probabilities = np.broadcast_to(pedigree.prior, (n, 3))
+        else:
+            probabilities = pedigree.inheritance[genes[:, pedigree.mother[j]], genes[:, pedigree.father[j]]]
+        genes[:, j] = draw(probabilities, rng)
+    return genes
+
+
+def weighting_round(pedigree, n, rng):
+    """
+    Draw `n` likelihood-weighted samples and return their sums as
+    (log scale, sum w, sum w^2, sum w x, sum w^2 x), where x is each
+    sample's one-hot gene counts and w = exp(log weight - log scale).
+    """
+    genes = forward_sample(pedigree, n, rng)
+    log_weights = np.zeros(n)
+    for j, trait in enumerate(pedigree.trait):
+        if trait >= 0:
+            log_weights += pedigree.log_trait[genes[:, j], trait]
+    scale = log_weights.max()
+    weights = np.exp(log_weights - scale)
+    squares = weights * weights
+    weighted = np.empty((len(pedigree), 3))
+    weighted_squares = np.empty((len(pedigree), 3))
+    for j in range(len(pedigree)):
+        weighted[j] = np.bincount(genes[:, j], weights=weights, minlength=3)
+        weighted_squares[j] = np.bincount(genes[:, j], weights=squares, minlength=3)
+    return scale, weights.sum(), squares.sum(), weighted, weighted_squares
+
+
+def conditional(pedigree, genes, j):
+    """
+    Return P(genes of person j | everyone else) for every chain, as a
+    (chains, 3) array: their own CPT, their trait evidence and the CPT
+    of each of their children.
+    """
+    chains = len(genes)
+    if pedigree.mother[j] < 0:
+        logs = np.broadcast_to(pedigree.log_prior, (chains, 3)).copy()
+    else:
+        logs = pedigree.log_inheritance[genes[:, pedigree.mother[j]], genes[:, pedigree.father[j]]]
+    if pedigree.trait[j] >= 0:
+        logs += pedigree.log_trait[:, pedigree.trait[j]]
+    for child, other, is_mother in pedigree.children[j]:
+        if is_mother:
+            logs += pedigree.log_inheritance[:, genes[:, other], genes[:, child]].T
+        else:
+            logs += pedigree.log_inheritance[genes[:, other], :, genes[:, child]]
+    logs -= logs.max(axis=1, keepdims=True)
+    probabilities = np.exp(logs)
+    return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+
+def gibbs_round(pedigree, genes, sweeps, rng, burn_in=0):
+    """
+    Advance every chain in `genes` by `burn_in` uncounted and `sweeps`
+    counted sweeps, updating one person at a time in place.
+
+    Returns the (chains, people, 3) sums of each person's full
+    conditional over the counted sweeps: averaging the conditionals
+    (Rao-Blackwellization) has lower variance than counting states.
+    """
+    sums = np.zeros((len(genes), len(pedigree), 3))
+    for sweep in range(burn_in + sweeps):
+        for j in range(len(pedigree)):
+            probabilities = conditional(pedigree, genes, j)
+            genes[:, j] = draw(probabilities, rng)
+            if sweep >= burn_in:
+                sums[:, j] += probabilities
+    return sums
+
+
+def sampling_worker(task):
+    """
+    Run one worker's share of a round and return its sums, plus the
+    Gibbs chains' state for the next round.
+    """
+    method, pedigree, count, seed_sequence, genes = task
+    rng = np.random.default_rng(seed_sequence)
+    if method == "weighting":
+        return weighting_round(pedigree, count, rng), None
+    burn_in = 0
+    if genes is None:
+        genes = forward_sample(pedigree, CHAINS, rng)
+        burn_in = BURN_IN
+    return gibbs_round(pedigree, genes, count, rng, burn_in), genes
+
+
+def weighting_estimate(rounds):
+    """
+    Combine likelihood weighting sums from every worker and round.
+
+    The self-normalized estimate sum(w x) / sum(w) has variance about
+    sum(w^2 (x - p)^2) / sum(w)^2, and Kish's (sum w)^2 / sum(w^2) is
+    its effective sample size.
+    """
+    scale = max(result[0] for result in rounds)
+    total, squares, weighted, weighted_squares = 0, 0, 0, 0
+    for log_scale, w, w2, wx, w2x in rounds:
+        factor = np.exp(log_scale - scale)
+        total += w * factor
+        squares += w2 * factor ** 2
+        weighted = weighted + wx * factor
+        weighted_squares = weighted_squares + w2x * factor ** 2
+    marginals = weighted / total
+    variance = (weighted_squares * (1 - 2 * marginals) + marginals ** 2 * squares) / total ** 2
+    return marginals, np.sqrt(np.maximum(variance, 0)), total ** 2 / squares
+
+
+def gibbs_estimate(chain_sums, sweeps):
+    """
+    Combine Gibbs chains, each with `sweeps` counted sweeps.
+
+    Chains are independent, so the spread of their means gives the
+    standard error whatever the autocorrelation within a chain. The
+    effective sample size is the number of independent draws with the
+    same error, p(1 - p) / se^2, taken at the worst-mixing entry.
+    """
+    means = chain_sums / sweeps
+    marginals = means.mean(axis=0)
+    standard_errors = means.std(axis=0, ddof=1) / np.sqrt(len(means))
+    ess = marginals * (1 - marginals) / np.maximum(standard_errors, 1e-300) ** 2
+    return marginals, standard_errors, float(ess.min())
+
+
+def estimate(people, method="gibbs", min_ess=1000, tol=None, max_samples=10 ** 7,
+             processes=None, seed=None):
+    """
+    Estimate P(genes | evidence) for everyone in `people` by Monte Carlo.
+
+    `method` is "weighting" (likelihood weighting: sample from the prior
+    and weight by the observed traits) or "gibbs" (CHAINS chains per
+    worker resampling one person at a time). Rounds of samples are
+    split across `processes` workers, each with its own stream spawned
+    from `seed`, until the effective sample size reaches `min_ess` and,
+    if given, every standard error is below `tol`; or until
+    `max_samples` samples (Gibbs: chain sweeps) have been drawn. Gibbs
+    estimates use the second half of every chain, after BURN_IN sweeps
+    that are never counted. A fixed seed and process count give the same
+    estimate every time.
+
+    Likelihood weighting degrades as evidence accumulates, since a few
+    samples end up with most of the weight; Gibbs keeps working on large
+    pedigrees but can mix slowly, which its error estimate reflects.
+    """
+    if method not in ("weighting", "gibbs"):
+        raise ValueError(f"unknown sampling method {method!r}")
+    pedigree = Pedigree(people)
+    processes = processes or multiprocessing.cpu_count()
+    streams = np.random.SeedSequence(seed).spawn(processes)
+    count = ROUND_SAMPLES if method == "weighting" else ROUND_SWEEPS
+    per_round = count * processes * (1 if method == "weighting" else CHAINS)
+
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    try:
+        states = [None] * processes
+        rounds, samples = [], 0
+        while True:
+            tasks = [
+                (method, pedigree, count, stream.spawn(1)[0], state)
+                for stream, state in zip(streams, states)
+            ]
+            results = pool.map(sampling_worker, tasks) if pool else list(map(sampling_worker, tasks))
+            samples += per_round
+            if method == "weighting":
+                rounds.extend(sums for sums, _ in results)
+                marginals, standard_errors, ess = weighting_estimate(rounds)
+            else:
+                rounds.append(np.concatenate([sums for sums, _ in results]))
+                states = [state for _, state in results]
+                # Only the second half of each chain counts, so the start is forgotten
+                kept = rounds[len(rounds) // 2:]
+                marginals, standard_errors, ess = gibbs_estimate(np.sum(kept, axis=0), count * len(kept))
+                ess = ess if len(rounds) > 1 else 0
+            converged = ess >= min_ess and (tol is None or standard_errors.max() <= tol)
+            if converged or samples >= max_samples:
+                break
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return Estimate(method, pedigree.names, marginals, standard_errors, ess, samples, converged)
+
+
+def infer(people, method="gibbs", **options):
+    """
+    Estimate the distributions by `method` ("weighting" or "gibbs"),
+    passing `options` on to `estimate`.
+    """
+    return distributions(people, estimate(people, method, **options).gene_marginals())
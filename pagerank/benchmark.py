@@ -0,0 +1,541 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import crawler
+import graphfile
+from incremental import incremental_pagerank
+from iteration import power_iteration
+from linkgraph import LinkGraph
+from pagerank import iterate_pagerank, sample_pagerank
+from personalized import FingerprintIndex, batch_iteration, personalized_pagerank, teleport_matrix
+from sampling import parallel_walk_counts, random_walk_counts
+from solvers import NORMS, SOLVERS, solve
+
+
+def synthetic_graph(num_pages, average_degree=8, dangling=0.1, components=1, orphans=0, seed=0):
+    """
+    Generate a web-like LinkGraph.
+
+    Out-degrees follow a heavy-tailed (Pareto) distribution, link targets
+    favour a few popular pages, a `dangling` fraction of pages has no
+    links, and pages are split into `components` groups that never link
+    to each other. The first `orphans` fraction of page numbers get no
+    in-links, as happens when unlinked pages sort first by name.
+    """
+    rng = np.random.default_rng(seed)
+    degrees = np.minimum(rng.pareto(2.0, num_pages) * (average_degree - 1) + 1, num_pages - 1).astype(np.int64)
+    degrees[rng.random(num_pages) < dangling] = 0
+    sources = np.repeat(np.arange(num_pages), degrees)
+
+    # Popularity is skewed within each component: target = start + size * u^3
+    component = np.minimum(sources * components // num_pages, components - 1)
+    starts = (np.arange(components + 1) * num_pages) // components
+    sizes = starts[component + 1] - starts[component]
+    targets = starts[component] + (sizes * rng.random(len(sources)) ** 3).astype(np.int64)
+    # Shuffle page numbers so popular pages are not all at the front
+    permutation = rng.permutation(num_pages)
+    sources, targets = permutation[sources], permutation[targets]
+    first = int(orphans * num_pages)
+    targets[targets < first] += first
+    return LinkGraph.from_edges(num_pages, sources, np.minimum(targets, num_pages - 1))
+
+
+def dense_pagerank(graph, damping_factor):
+    """
+    Exact PageRank from a dense linear solve, for checking small graphs.
+    """
+    n = graph.num_pages
+    matrix = np.zeros((n, n))
+    for page in range(n):
+        links = graph.links(page)
+        if len(links):
+            matrix[links, page] = 1 / len(links)
+        else:
+            matrix[:, page] = 1 / n
+    ranks = np.linalg.solve(np.eye(n) - damping_factor * matrix, np.full(n, (1 - damping_factor) / n))
+    return ranks / ranks.sum()
+
+
+def bench_iterate(args):
+    """
+    Time the sparse power-iteration engine on synthetic graphs.
+    """
+    print(f"{'pages':>9} {'links':>10} {'build':>8} {'iters':>6} {'solve':>8} {'ms/iter':>8}")
+    for num_pages in args.sizes:
+        start = time.perf_counter()
+        graph = synthetic_graph(num_pages, seed=args.seed)
+        graph.transpose()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ranks, iterations = power_iteration(graph, args.damping, args.tol)
+        solve = time.perf_counter() - start
+        print(f"{num_pages:>9} {graph.num_links:>10} {build:>8.3f} {iterations:>6} {solve:>8.3f} "
+              f"{solve / iterations * 1000:>8.2f}")
+
+    if args.check:
+        graph = synthetic_graph(args.check, seed=args.seed)
+        ranks, _ = power_iteration(graph, args.damping, args.tol)
+        error = np.abs(ranks - dense_pagerank(graph, args.damping)).sum()
+        print(f"L1 error against a dense solve on {args.check} pages: {error:.2e}")
+
+
+def bench_solvers(args):
+    """
+    Compare the convergence of each solver: iterations, time and error
+    against a tightly converged reference. With --history, the residual
+    after every iteration is written to a JSON file.
+    """
+    graph = synthetic_graph(args.pages, seed=args.seed)
+    graph.transpose()
+    reference, _ = power_iteration(graph, args.damping, 1e-13)
+    print(f"{graph.num_pages} pages, {graph.num_links} links, {args.norm} tolerance {args.tol}")
+    print(f"{'solver':>13} {'iters':>6} {'seconds':>8} {'ms/iter':>8} {'L1 error':>9}")
+    histories = {}
+    for method in args.methods:
+        solution = solve(graph, args.damping, method, args.tol, args.norm)
+        error = np.abs(solution.ranks - reference).sum()
+        print(f"{method:>13} {solution.iterations:>6} {solution.seconds:>8.3f} "
+              f"{solution.seconds / solution.iterations * 1000:>8.2f} {error:>9.2e}")
+        histories[method] = {"seconds": solution.seconds, "residuals": solution.residuals}
+    if args.history:
+        with open(args.history, "w") as f:
+            json.dump(histories, f, indent=1)
+
+
+def bench_personalized(args):
+    """
+    Time batched personalized PageRank against one iteration per seed
+    set, then build a fingerprint index and time single-seed queries.
+    """
+    rng = np.random.default_rng(args.seed)
+    graph = synthetic_graph(args.pages, seed=args.seed)
+    graph.transpose()
+    seeds = rng.choice(graph.num_pages, args.sets, replace=False)
+    teleport = teleport_matrix(graph, [[page] for page in seeds])
+    print(f"{graph.num_pages} pages, {graph.num_links} links, {args.sets} single-page seed sets")
+
+    start = time.perf_counter()
+    for column in range(args.sets):
+        batch_iteration(graph, args.damping, teleport[:, column:column + 1])
+    one_by_one = time.perf_counter() - start
+    start = time.perf_counter()
+    exact = personalized_pagerank(graph, args.damping, teleport, batch=args.batch)
+    batched = time.perf_counter() - start
+    print(f"one at a time: {one_by_one:8.3f}s")
+    print(f"batched by {args.batch:>3}: {batched:8.3f}s  ({one_by_one / batched:.1f}x)")
+
+    start = time.perf_counter()
+    index = FingerprintIndex.build(graph, args.damping, args.walks, seed=args.seed)
+    build = time.perf_counter() - start
+    print(f"fingerprints: {args.walks} walks per page, {index.nbytes / 2 ** 20:.1f} MiB, built in {build:.3f}s")
+    start = time.perf_counter()
+    for page in seeds:
+        index.query([page])
+    query = (time.perf_counter() - start) / args.sets
+    errors, overlaps = [], []
+    for column, page in enumerate(seeds):
+        approximate = index.dense([page], graph.num_pages)
+        errors.append(np.abs(approximate - exact[:, column]).sum())
+        top = set(np.argsort(exact[:, column])[-10:])
+        overlaps.append(len(top & set(np.argsort(approximate)[-10:])) / 10)
+    print(f"query: {query * 1e6:.0f} us, mean L1 error {np.mean(errors):.3f}, "
+          f"top-10 overlap {np.mean(overlaps):.2f}")
+
+
+def bench_sample(args):
+    """
+    Time the vectorized random-walk sampler and its error against
+    power iteration as the number of samples grows.
+    """
+    graph = synthetic_graph(args.pages, seed=args.seed)
+    reference, _ = power_iteration(graph, args.damping, 1e-12)
+    print(f"{graph.num_pages} pages, {graph.num_links} links, {args.walkers} walkers")
+    print(f"{'samples':>10} {'seconds':>8} {'M samples/s':>12} {'L1 error':>9}")
+    for n in args.samples:
+        start = time.perf_counter()
+        counts = random_walk_counts(graph, args.damping, n, args.walkers, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        error = np.abs(counts / n - reference).sum()
+        print(f"{n:>10} {elapsed:>8.3f} {n / elapsed / 1e6:>12.2f} {error:>9.4f}")
+
+
+def bench_parallel(args):
+    """
+    Report the speedup of multi-process sampling against one process.
+    """
+    graph = synthetic_graph(args.pages, seed=args.seed)
+    reference, _ = power_iteration(graph, args.damping, 1e-12)
+    print(f"{graph.num_pages} pages, {args.samples} samples, {os.cpu_count()} cores")
+    print(f"{'processes':>9} {'seconds':>8} {'speedup':>8} {'L1 error':>9}")
+    baseline = None
+    for processes in args.processes:
+        start = time.perf_counter()
+        if processes == 1:
+            counts = random_walk_counts(graph, args.damping, args.samples, args.walkers, seed=args.seed)
+        else:
+            counts = parallel_walk_counts(graph, args.damping, args.samples, processes, args.walkers, args.seed)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        error = np.abs(counts / args.samples - reference).sum()
+        print(f"{processes:>9} {elapsed:>8.3f} {baseline / elapsed:>8.2f} {error:>9.4f}")
+
+
+def kendall_tau(x, y, max_pages=2000, seed=0, ties=1e-12):
+    """
+    Kendall's tau-b between two rank vectors, over a fixed random sample
+    of `max_pages` pages when there are more (the pairwise count is
+    quadratic). Ranks within `ties` of each other count as tied, so
+    rounding noise does not order pages that are exactly equal.
+    """
+    def signs(values, start):
+        difference = values[start:start + 256, None] - values[None, :]
+        return np.where(np.abs(difference) <= ties, 0, np.sign(difference))
+
+    if len(x) > max_pages:
+        sample = np.random.default_rng(seed).choice(len(x), max_pages, replace=False)
+        x, y = x[sample], y[sample]
+    concordance, x_pairs, y_pairs = 0, 0, 0
+    for start in range(0, len(x), 256):
+        sx, sy = signs(x, start), signs(y, start)
+        concordance += (sx * sy).sum()
+        x_pairs += np.count_nonzero(sx)
+        y_pairs += np.count_nonzero(sy)
+    if x_pairs == 0 or y_pairs == 0:
+        return 1.0
+    return float(concordance / np.sqrt(x_pairs * y_pairs))
+
+
+# Synthetic graph shapes for the accuracy benchmark, as synthetic_graph options
+SHAPES = {
+    "power-law": {},
+    "half-dangling": {"dangling": 0.5},
+    "components": {"components": 10},
+    "orphans-first": {"orphans": 0.05},
+}
+
+
+def accuracy_graphs(args):
+    """
+    Yield (name, graph) for the synthetic graphs and bundled corpora.
+    """
+    for name, options in SHAPES.items():
+        yield f"{name}-{args.pages}", synthetic_graph(args.pages, seed=args.seed, **options)
+    here = os.path.dirname(os.path.abspath(__file__))
+    for corpus in args.corpora:
+        yield corpus, LinkGraph.from_corpus(crawler.crawl(os.path.join(here, corpus), use_cache=False))
+
+
+def measure(function):
+    """
+    Run `function` and return its result, wall time and peak traced memory.
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def reference_pagerank(graph, damping_factor):
+    """
+    Return PageRank to near machine precision: a dense solve on small
+    graphs, otherwise block Gauss-Seidel to 1e-14. Neither goes through
+    iteration.follow_links, so a bug there cannot cancel out of the
+    errors measured against it.
+    """
+    if graph.num_pages <= 2000:
+        return dense_pagerank(graph, damping_factor)
+    return solve(graph, damping_factor, "gauss-seidel", tol=1e-14, max_iterations=10000).ranks
+
+
+def check_references(args):
+    """
+    Compare the Gauss-Seidel reference and iterate_pagerank with a dense
+    solve on a small graph of every synthetic shape, and return records.
+    """
+    records = []
+    for name, options in SHAPES.items():
+        graph = synthetic_graph(args.check_pages, seed=args.seed, **options)
+        exact = dense_pagerank(graph, args.damping)
+        reference = solve(graph, args.damping, "gauss-seidel", tol=1e-14, max_iterations=10000).ranks
+        ranks = iterate_pagerank(graph, args.damping, 1e-12)
+        ranks = np.fromiter(ranks.values(), dtype=np.float64, count=graph.num_pages)
+        record = {
+            "graph": f"{name}-{args.check_pages}",
+            "reference_l1_error": float(np.abs(reference - exact).sum()),
+            "iterate_l1_error": float(np.abs(ranks - exact).sum()),
+        }
+        records.append(record)
+        print(f"{record['graph']:>20} Gauss-Seidel reference {record['reference_l1_error']:.1e}, "
+              f"iterate tol=1e-12 {record['iterate_l1_error']:.1e} (L1 vs dense solve)")
+    return records
+
+
+def bench_accuracy(args):
+    """
+    Run sample_pagerank and iterate_pagerank on synthetic graphs and the
+    bundled corpora, and compare each with a high-precision reference,
+    after checking the reference against a dense solve on small graphs.
+    Prints a table and, with --output, writes the records as JSON.
+    """
+    checks = check_references(args)
+    records = []
+    print(f"{'graph':>20} {'method':>18} {'seconds':>8} {'peak MiB':>9} {'L1 error':>9} {'tau':>7}")
+    for name, graph in accuracy_graphs(args):
+        graph.transpose()
+        reference = reference_pagerank(graph, args.damping)
+        runs = [(f"sample n={n}", lambda n=n: sample_pagerank(graph, args.damping, n, seed=args.seed))
+                for n in args.samples]
+        runs += [(f"iterate tol={tol:g}", lambda tol=tol: iterate_pagerank(graph, args.damping, tol))
+                 for tol in args.tols]
+        for method, run in runs:
+            ranks, elapsed, peak = measure(run)
+            ranks = np.fromiter(ranks.values(), dtype=np.float64, count=graph.num_pages)
+            record = {
+                "graph": name,
+                "pages": graph.num_pages,
+                "links": graph.num_links,
+                "method": method,
+                "seconds": elapsed,
+                "peak_bytes": peak,
+                "l1_error": float(np.abs(ranks - reference).sum()),
+                "kendall_tau": kendall_tau(ranks, reference, seed=args.seed),
+            }
+            records.append(record)
+            print(f"{name:>20} {method:>18} {elapsed:>8.3f} {peak / 2 ** 20:>9.1f} "
+                  f"{record['l1_error']:>9.2e} {record['kendall_tau']:>7.4f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"damping": args.damping, "seed": args.seed, "checks": checks, "results": records},
+                      f, indent=1)
+
+
+def peak_rss():
+    """
+    Return this process's peak resident memory in MiB. Read from
+    /proc (Linux) because ru_maxrss carries over the parent's peak
+    into a spawned process.
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def rank_graph_file(path, damping_factor, samples, in_memory):
+    """
+    Rank the graph file at `path`, mapped or copied into memory, and
+    return (seconds to open, to iterate, to sample, peak RSS in MiB).
+    Run in a fresh process so the peak belongs to this work alone.
+    """
+    start = time.perf_counter()
+    graph = graphfile.read_graph(path)
+    if in_memory:
+        in_indptr, in_indices = graph.in_links()
+        graph = LinkGraph(list(graph.names), np.array(graph.out_indptr), np.array(graph.out_indices),
+                          in_links=(np.array(in_indptr), np.array(in_indices)))
+    opened = time.perf_counter() - start
+    start = time.perf_counter()
+    power_iteration(graph, damping_factor)
+    iterated = time.perf_counter() - start
+    start = time.perf_counter()
+    random_walk_counts(graph, damping_factor, samples)
+    sampled = time.perf_counter() - start
+    return opened, iterated, sampled, peak_rss()
+
+
+def bench_mapped(args):
+    """
+    Write a synthetic graph file, then rank it memory-mapped and copied
+    into memory, each in a fresh process.
+    """
+    graph = synthetic_graph(args.pages, seed=args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, graphfile.GRAPH_NAME)
+        start = time.perf_counter()
+        graphfile.write_graph(graph, path)
+        written = time.perf_counter() - start
+        print(f"{graph.num_pages} pages, {graph.num_links} links: "
+              f"{os.path.getsize(path) / 2 ** 20:.1f} MiB written in {written:.2f}s")
+        del graph
+        print(f"{'':>9} {'open':>7} {'iterate':>8} {'sample':>7} {'peak MiB':>9}")
+        context = multiprocessing.get_context("spawn")
+        for label, in_memory in (("mapped", False), ("in memory", True)):
+            with context.Pool(1) as pool:
+                opened, iterated, sampled, peak = pool.apply(
+                    rank_graph_file, (path, args.damping, args.samples, in_memory))
+            print(f"{label:>9} {opened:>7.3f} {iterated:>8.3f} {sampled:>7.3f} {peak:>9.1f}")
+
+
+def write_corpus(graph, directory, padding=2000):
+    """
+    Write `graph` as a directory of HTML pages, with `padding` bytes of
+    filler text per page so parsing cost resembles real pages.
+    """
+    os.makedirs(directory, exist_ok=True)
+    filler = "<p>" + "lorem ipsum " * (padding // 12) + "</p>\n"
+    for page in range(graph.num_pages):
+        with open(os.path.join(directory, f"{page}.html"), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html><body><h1>{page}</h1>\n{filler}")
+            for link in graph.links(page):
+                f.write(f'<a href="{link}.html">{link}</a>\n')
+            f.write("</body></html>\n")
+
+
+def bench_crawl(args):
+    """
+    Time a cold crawl, a warm crawl from the link cache, and a re-crawl
+    after touching a few pages.
+    """
+    graph = synthetic_graph(args.pages, seed=args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(graph, directory)
+        for label, touch in (("cold", 0), ("warm", 0), (f"{args.touch} changed", args.touch)):
+            for page in range(touch):
+                path = os.path.join(directory, f"{page}.html")
+                with open(path, "a") as f:
+                    f.write("<!-- edited -->\n")
+            start = time.perf_counter()
+            _, parsed = crawler.crawl_links(directory, args.workers)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>12}: {elapsed:8.3f}s  {len(parsed)} of {graph.num_pages} pages parsed")
+
+
+def perturb(graph, changes, rng):
+    """
+    Return a copy of `graph` with `changes` links removed and as many
+    random links added, plus the pages whose inbound rank changed: the
+    old and new out-links of every page whose out-links changed.
+    """
+    sources = np.repeat(np.arange(graph.num_pages), graph.out_degree)
+    targets = graph.out_indices.astype(np.int64)
+    removed = rng.choice(graph.num_links, changes, replace=False)
+    keep = np.ones(graph.num_links, dtype=bool)
+    keep[removed] = False
+    new_sources = rng.integers(graph.num_pages, size=changes)
+    new_targets = rng.integers(graph.num_pages, size=changes)
+    updated = LinkGraph.from_edges(graph.num_pages, np.concatenate((sources[keep], new_sources)),
+                                   np.concatenate((targets[keep], new_targets)), graph.names)
+    changed = set()
+    for page in np.unique(np.concatenate((sources[removed], new_sources))):
+        changed.update(graph.names[target] for target in graph.links(page))
+        changed.update(updated.names[target] for target in updated.links(page))
+    return updated, changed
+
+
+def bench_incremental(args):
+    """
+    Compare a cold solve after a few link changes with warm starts from
+    the previous ranks, globally and restricted to the affected region.
+    """
+    rng = np.random.default_rng(args.seed)
+    graph = synthetic_graph(args.pages, seed=args.seed)
+    ranks, _ = power_iteration(graph, args.damping, args.tol)
+    previous = graph.to_dict(ranks)
+    print(f"{graph.num_pages} pages, {graph.num_links} links, tolerance {args.tol}")
+    print(f"{'changes':>7} {'method':>10} {'iters':>6} {'seconds':>8} {'L1 error':>9}")
+    for changes in args.changes:
+        updated, changed = perturb(graph, changes, rng)
+        updated.transpose()
+        reference, _ = power_iteration(updated, args.damping, 1e-12)
+        methods = (("cold", lambda: power_iteration(updated, args.damping, args.tol)),
+                   ("warm", lambda: incremental_pagerank(updated, args.damping, previous, changed, args.tol)),
+                   (f"{args.hops}-hop", lambda: incremental_pagerank(updated, args.damping, previous, changed,
+                                                                     args.tol, args.hops)))
+        for label, solve in methods:
+            start = time.perf_counter()
+            result, iterations = solve()
+            elapsed = time.perf_counter() - start
+            error = np.abs(result - reference).sum()
+            print(f"{changes:>7} {label:>10} {iterations:>6} {elapsed:>8.3f} {error:>9.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for pagerank.py")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--damping", type=float, default=0.85)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    iterate = subparsers.add_parser("iterate", help="sparse power iteration on synthetic graphs")
+    iterate.add_argument("--sizes", type=int, nargs="+", default=[10 ** 4, 10 ** 5, 10 ** 6])
+    iterate.add_argument("--tol", type=float, default=1e-6)
+    iterate.add_argument("--check", type=int, default=1000, metavar="PAGES",
+                         help="compare against a dense solve on a graph this size (0 to skip)")
+    iterate.set_defaults(run=bench_iterate)
+
+    solvers = subparsers.add_parser("solvers", help="convergence of the iterative solvers")
+    solvers.add_argument("--pages", type=int, default=10 ** 6)
+    solvers.add_argument("--methods", nargs="+", choices=list(SOLVERS), default=list(SOLVERS))
+    solvers.add_argument("--norm", choices=list(NORMS), default="l1")
+    solvers.add_argument("--tol", type=float, default=1e-6)
+    solvers.add_argument("--history", metavar="FILE", help="write residual histories as JSON")
+    solvers.set_defaults(run=bench_solvers)
+
+    personalized = subparsers.add_parser("personalized", help="batched and fingerprint personalized PageRank")
+    personalized.add_argument("--pages", type=int, default=10 ** 5)
+    personalized.add_argument("--sets", type=int, default=64, help="number of seed sets")
+    personalized.add_argument("--batch", type=int, default=64, help="teleport vectors per batch")
+    personalized.add_argument("--walks", type=int, default=64, help="fingerprint walks per page")
+    personalized.set_defaults(run=bench_personalized)
+
+    sample = subparsers.add_parser("sample", help="vectorized random-walk sampler")
+    sample.add_argument("--pages", type=int, default=10000)
+    sample.add_argument("--samples", type=int, nargs="+", default=[10 ** 5, 10 ** 6, 10 ** 7])
+    sample.add_argument("--walkers", type=int, default=1024)
+    sample.set_defaults(run=bench_sample)
+
+    parallel = subparsers.add_parser("parallel", help="multi-process sampling speedup")
+    parallel.add_argument("--pages", type=int, default=100000)
+    parallel.add_argument("--samples", type=int, default=2 * 10 ** 7)
+    parallel.add_argument("--walkers", type=int, default=4096)
+    parallel.add_argument("--processes", type=int, nargs="+",
+                          default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parallel.set_defaults(run=bench_parallel)
+
+    accuracy = subparsers.add_parser("accuracy", help="time, memory and error of sampling and iteration")
+    accuracy.add_argument("--pages", type=int, default=10 ** 5, help="pages per synthetic graph")
+    accuracy.add_argument("--check-pages", type=int, default=1000,
+                          help="pages per synthetic graph checked against a dense solve")
+    accuracy.add_argument("--corpora", nargs="*", default=["corpus0", "corpus1", "corpus2"])
+    accuracy.add_argument("--samples", type=int, nargs="+", default=[10 ** 4, 10 ** 5, 10 ** 6])
+    accuracy.add_argument("--tols", type=float, nargs="+", default=[1e-3, 1e-6])
+    accuracy.add_argument("--output", metavar="FILE", help="write the results as JSON")
+    accuracy.set_defaults(run=bench_accuracy)
+
+    mapped = subparsers.add_parser("mapped", help="ranking from a memory-mapped graph file")
+    mapped.add_argument("--pages", type=int, default=2 * 10 ** 6)
+    mapped.add_argument("--samples", type=int, default=10 ** 7)
+    mapped.set_defaults(run=bench_mapped)
+
+    crawl = subparsers.add_parser("crawl", help="cold, cached and incremental crawls")
+    crawl.add_argument("--pages", type=int, default=5000)
+    crawl.add_argument("--workers", type=int, default=8, help="I/O threads")
+    crawl.add_argument("--touch", type=int, default=10, help="pages to modify before the last crawl")
+    crawl.set_defaults(run=bench_crawl)
+
+    incremental = subparsers.add_parser("incremental", help="warm-started updates after link changes")
+    incremental.add_argument("--pages", type=int, default=10 ** 6)
+    incremental.add_argument("--changes", type=int, nargs="+", default=[10, 1000, 100000])
+    incremental.add_argument("--hops", type=int, default=3, help="radius of the initial updated region")
+    incremental.add_argument("--tol", type=float, default=1e-6)
+    incremental.set_defaults(run=bench_incremental)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
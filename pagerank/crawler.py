@@ -0,0 +1,112 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+
+CACHE_NAME = ".linkcache.json"
+CACHE_VERSION = 1
+
+# Bytes read from a page at a time
+READ_SIZE = 64 * 1024
+
+
+class LinkParser(HTMLParser):
+    """
+    Collects the href of every <a> tag fed to it, chunk by chunk.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value is not None:
+                    self.links.add(value)
+
+
+def parse_links(path):
+    """
+    Stream the HTML file at `path` through a LinkParser and return the
+    set of pages it links to.
+    """
+    parser = LinkParser()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    parser.close()
+    return parser.links
+
+
+def load_cache(directory):
+    try:
+        with open(os.path.join(directory, CACHE_NAME), encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache["pages"]
+
+
+def save_cache(directory, pages):
+    path = os.path.join(directory, CACHE_NAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "pages": pages}, f)
+        os.replace(temporary, path)
+    except OSError:
+        pass  # Unwritable corpus: every file is parsed again next crawl
+
+
+def crawl_links(directory, workers=None, use_cache=True):
+    """
+    Return {filename: set of hrefs} for every .html file in `directory`,
+    plus the list of files that had to be parsed.
+
+    Files whose path, size and modification time match the link cache
+    are not read again; the rest are parsed on a pool of `workers` threads.
+    """
+    cached = load_cache(directory) if use_cache else {}
+    entries = {}
+    stale = []
+    with os.scandir(directory) as scan:
+        for entry in scan:
+            if not entry.name.endswith(".html") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            key = [stat.st_mtime_ns, stat.st_size]
+            entries[entry.name] = key
+            hit = cached.get(entry.name)
+            if hit is None or hit["stat"] != key:
+                stale.append(entry.name)
+
+    with ThreadPoolExecutor(workers) as pool:
+        parsed = dict(zip(stale, pool.map(lambda name: parse_links(os.path.join(directory, name)), stale)))
+
+    links = {}
+    for name, key in entries.items():
+        links[name] = parsed[name] if name in parsed else set(cached[name]["links"])
+
+    if use_cache and (stale or len(cached) != len(entries)):
+        save_cache(directory, {
+            name: {"stat": entries[name], "links": sorted(links[name])}
+            for name in entries
+        })
+    return links, stale
+
+
+def crawl(directory, workers=None, use_cache=True):
+    """
+    Return {page: set of other corpus pages it links to} for `directory`.
+    """
+    links, _ = crawl_links(directory, workers, use_cache)
+    return {
+        name: {link for link in page_links if link != name and link in links}
+        for name, page_links in links.items()
+    }
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+import crawler
+from linkgraph import LinkGraph
+
+# Graph files with any other version are ignored and rewritten from the corpus
+GRAPH_VERSION = 1
+GRAPH_NAME = ".pagerank.graph"
+MAGIC = b"PRGRAPH\0"
+HEADER = struct.Struct("<8sII")
+
+
+class NameTable():
+    """
+    Page names packed into one UTF-8 blob, decoded on access.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def fingerprint(directory):
+    """
+    Hash the name, size and modification time of every page in `directory`.
+    """
+    digest = hashlib.sha1()
+    with os.scandir(directory) as scan:
+        for entry in sorted(scan, key=lambda entry: entry.name):
+            if entry.name.endswith(".html") and entry.is_file():
+                stat = entry.stat()
+                digest.update(f"{entry.name}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_graph(graph, path, source=None):
+    """
+    Write `graph` to a temporary file renamed over `path`, so read_graph
+    never maps a half-written graph.
+
+    Offsets are int32 while the graph has fewer than 2^31 links, and
+    page numbers are always int32. The in-link arrays are written too so
+    that iteration never has to transpose the graph in memory.
+    """
+    offset_type = np.int32 if graph.num_links < 2 ** 31 else np.int64
+    names = graph.names if isinstance(graph.names, NameTable) else NameTable.from_strings(graph.names)
+    in_indptr, in_indices = graph.in_links()
+    sections = [
+        ("names.blob", names.blob),
+        ("names.offsets", names.offsets),
+        ("out_indptr", np.asarray(graph.out_indptr, dtype=offset_type)),
+        ("out_indices", np.asarray(graph.out_indices, dtype=np.int32)),
+        ("in_indptr", np.asarray(in_indptr, dtype=offset_type)),
+        ("in_indices", np.asarray(in_indices, dtype=np.int32)),
+    ]
+
+    # The table of contents records each array's offset from the end of
+    # the header, its length in elements and its numpy dtype
+    contents = {}
+    position = 0
+    for name, values in sections:
+        contents[name] = [position, len(values), values.dtype.str]
+        position += align(values.nbytes)
+    toc = json.dumps({"source": source, "sections": contents}).encode("utf-8")
+    start = align(HEADER.size + len(toc))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, GRAPH_VERSION, len(toc)))
+        f.write(toc)
+        f.write(bytes(start - HEADER.size - len(toc)))
+        for name, values in sections:
+            values.tofile(f)
+            f.write(bytes(align(values.nbytes) - values.nbytes))
+    os.replace(temporary, path)
+
+
+def read_graph(path, source=None):
+    """
+    Map the graph file at `path` as a LinkGraph whose link arrays stay
+    on disk, paged in by the OS as they are touched. Returns None if the
+    file is missing, from another version, or was written for a
+    different `source` fingerprint.
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, version, toc_size = HEADER.unpack(f.read(HEADER.size))
+            toc = json.loads(f.read(toc_size))
+    except (OSError, ValueError, struct.error):
+        return None
+    if magic != MAGIC or version != GRAPH_VERSION:
+        return None
+    if source is not None and toc["source"] != source:
+        return None
+
+    start = align(HEADER.size + toc_size)
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def section(name):
+        offset, count, dtype = toc["sections"][name]
+        dtype = np.dtype(dtype)
+        return mapped[start + offset:start + offset + count * dtype.itemsize].view(dtype)
+
+    names = NameTable(section("names.blob"), section("names.offsets"))
+    graph = LinkGraph(names, section("out_indptr"), section("out_indices"),
+                      in_links=(section("in_indptr"), section("in_indices")))
+    graph.path = path
+    return graph
+
+
+def load_graph(directory, workers=None):
+    """
+    Return the graph of the corpus in `directory`, mapped from its graph
+    file when that is current, otherwise crawled and written out for
+    the next run.
+    """
+    path = os.path.join(directory, GRAPH_NAME)
+    source = fingerprint(directory)
+    graph = read_graph(path, source)
+    if graph is None:
+        graph = LinkGraph.from_corpus(crawler.crawl(directory, workers))
+        try:
+            write_graph(graph, path, source)
+        except OSError:
+            return graph  # Can't write next to the pages, so use the crawl as is
+        graph = read_graph(path, source)
+    return graph
+
+
+def align(size):
+    """
+    Round `size` up to a multiple of 8, so every array read_graph maps
+    starts where an int64 view of it can begin.
+    """
+    return (size + 7) & ~7
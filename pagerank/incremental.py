@@ -0,0 +1,211 @@
+import os
+import sys
+
+import numpy as np
+
+import crawler
+from iteration import TOLERANCE, concatenated_ranges, power_iteration, step
+from linkgraph import LinkGraph
+
+RANKS_NAME = ".pagerank-ranks.npz"
+
+
+def save_ranks(directory, names, ranks, damping_factor):
+    """
+    Store a rank vector next to the link cache of `directory`.
+    """
+    path = os.path.join(directory, RANKS_NAME)
+    temporary = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(temporary, names=np.array(names, dtype=str), ranks=ranks, damping=damping_factor)
+    os.replace(temporary, path)
+
+
+def load_ranks(directory, damping_factor):
+    """
+    Return the {page: rank} stored for `directory`, or None if there is
+    none for this damping factor.
+    """
+    try:
+        with np.load(os.path.join(directory, RANKS_NAME)) as saved:
+            if float(saved["damping"]) != damping_factor:
+                return None
+            return dict(zip(saved["names"].tolist(), saved["ranks"].tolist()))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def link_diff(old, new):
+    """
+    Return the (source, target) links added to and removed from corpus
+    `old` to give corpus `new`.
+    """
+    added, removed = set(), set()
+    for page in old.keys() | new.keys():
+        before, after = old.get(page, set()), new.get(page, set())
+        added.update((page, link) for link in after - before)
+        removed.update((page, link) for link in before - after)
+    return added, removed
+
+
+def changed_pages(old, new, added, removed):
+    """
+    Return the pages whose inbound rank changes when corpus `old` becomes
+    `new` through the `added` and `removed` links.
+
+    A page whose out-links change also changes its out-degree, so every
+    page it linked to before or links to now gets a different share of
+    its rank. Pages that appear or disappear are included as well.
+    """
+    changed = old.keys() ^ new.keys()
+    for source in {source for source, _ in added | removed}:
+        changed |= old.get(source, set()) | new.get(source, set())
+    return changed
+
+
+def apply_link_diff(corpus, added=(), removed=()):
+    """
+    Return a copy of `corpus` with the given links added and removed.
+    """
+    updated = {page: set(links) for page, links in corpus.items()}
+    for source, target in removed:
+        updated.get(source, set()).discard(target)
+    for source, target in added:
+        updated.setdefault(source, set()).add(target)
+        updated.setdefault(target, set())
+    return updated
+
+
+def warm_start(graph, previous):
+    """
+    Map a previous {page: rank} onto `graph`'s pages; new pages start at
+    1 / N and the vector is renormalized.
+    """
+    n = graph.num_pages
+    ranks = np.array([previous.get(name, 1 / n) for name in graph.names], dtype=np.float64)
+    return ranks / ranks.sum()
+
+
+def affected_region(graph, seeds, hops):
+    """
+    Return the sorted page numbers within `hops` outlinks of `seeds`.
+    """
+    region = np.zeros(graph.num_pages, dtype=bool)
+    frontier = np.unique(np.asarray(seeds, dtype=np.int64))
+    region[frontier] = True
+    for _ in range(hops):
+        if len(frontier) == 0:
+            break
+        starts, ends = graph.out_indptr[frontier], graph.out_indptr[frontier + 1]
+        reached = graph.out_indices[concatenated_ranges(starts, ends)]
+        frontier = np.unique(reached[~region[reached]])
+        region[frontier] = True
+    return np.flatnonzero(region)
+
+
+def region_iteration(graph, damping_factor, ranks, region, tol=TOLERANCE, max_iterations=1000):
+    """
+    Power iteration that only updates pages in `region`, holding every
+    other page at its value in `ranks`. Each iteration touches only the
+    links into the region.
+    """
+    in_indptr, in_indices, in_weights = graph.transpose()
+    starts, ends = in_indptr[region], in_indptr[region + 1]
+    positions = concatenated_ranges(starts, ends)
+    sources, weights = in_indices[positions], in_weights[positions]
+    row_ends = np.cumsum(ends - starts)
+    row_starts = row_ends - (ends - starts)
+
+    n = graph.num_pages
+    ranks = ranks.copy()
+    region_dangling = region[graph.dangling[region]]
+    outside_dangling = ranks[graph.dangling].sum() - ranks[region_dangling].sum()
+    for iteration in range(1, max_iterations + 1):
+        flow = np.zeros(len(positions) + 1)
+        np.cumsum(weights * ranks[sources], out=flow[1:])
+        dangling_mass = outside_dangling + ranks[region_dangling].sum()
+        updated = damping_factor * (flow[row_ends] - flow[row_starts] + dangling_mass / n) + (1 - damping_factor) / n
+        residual = np.abs(updated - ranks[region]).sum()
+        ranks[region] = updated
+        if residual < tol:
+            break
+    return ranks / ranks.sum(), iteration
+
+
+def incremental_pagerank(graph, damping_factor, previous, changed=(), tol=TOLERANCE, region_hops=None):
+    """
+    Recompute PageRank on `graph` warm-started from the `previous`
+    {page: rank}.
+
+    By default the whole graph is iterated from the warm start. With
+    `region_hops`, only pages within that many links of the `changed`
+    pages (see changed_pages) are iterated at first. After the region
+    converges, one full step checks the whole graph: if it still moves
+    the ranks by `tol` or more, every page it moved by more than its
+    share of `tol` joins the region and the region is solved again, so
+    the result meets the same tolerance as a full solve.
+
+    Returns the rank vector and the number of iterations taken, counting
+    each full check as one.
+    """
+    start = warm_start(graph, previous)
+    if region_hops is None:
+        return power_iteration(graph, damping_factor, tol, start=start)
+    seeds = [graph.index[page] for page in changed if page in graph.index]
+    region = affected_region(graph, seeds, region_hops)
+    if len(region) == 0:
+        return start, 0
+    ranks, iterations = start, 0
+    while True:
+        ranks, region_iterations = region_iteration(graph, damping_factor, ranks, region, tol)
+        updated = step(graph, ranks, damping_factor)
+        iterations += region_iterations + 1
+        moved = np.abs(updated - ranks)
+        if moved.sum() < tol:
+            return updated / updated.sum(), iterations
+        grown = np.union1d(region, np.flatnonzero(moved > tol / graph.num_pages))
+        if len(grown) == len(region):
+            # The region is settled but the rest still drifts as a whole
+            ranks, remaining = power_iteration(graph, damping_factor, tol, start=updated)
+            return ranks, iterations + remaining
+        region = grown
+
+
+def update_pagerank(directory, damping_factor, tol=TOLERANCE, region_hops=None, workers=None):
+    """
+    Re-crawl `directory` and update its stored PageRank.
+
+    Only changed files are re-parsed (see crawler.py), the new ranks are
+    warm-started from the ones saved by the previous run, and the result
+    is saved again. Returns ({page: rank}, iterations, links changed).
+    """
+    cached = crawler.load_cache(directory)
+    old_corpus = {
+        name: {link for link in entry["links"] if link != name and link in cached}
+        for name, entry in cached.items()
+    }
+    corpus = crawler.crawl(directory, workers)
+    graph = LinkGraph.from_corpus(corpus)
+
+    previous = load_ranks(directory, damping_factor)
+    added, removed = link_diff(old_corpus, corpus)
+    if previous is None:
+        ranks, iterations = power_iteration(graph, damping_factor, tol)
+    else:
+        changed = changed_pages(old_corpus, corpus, added, removed) | (corpus.keys() - previous.keys())
+        ranks, iterations = incremental_pagerank(graph, damping_factor, previous, changed, tol, region_hops)
+    save_ranks(directory, graph.names, ranks, damping_factor)
+    return graph.to_dict(ranks), iterations, len(added) + len(removed)
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python incremental.py corpus [region_hops]")
+    region_hops = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    ranks, iterations, changes = update_pagerank(sys.argv[1], 0.85, region_hops=region_hops)
+    print(f"PageRank Results after {changes} link changes ({iterations} iterations)")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
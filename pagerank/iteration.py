@@ -0,0 +1,71 @@
+import numpy as np
+
+# Stop once the L1 distance between successive rank vectors is below this
+TOLERANCE = 1e-6
+
+# Links gathered at a time by follow_links, so scratch memory does not grow with the graph
+BLOCK_LINKS = 2 ** 22
+
+
+def concatenated_ranges(starts, ends):
+    """
+    Return the concatenation of range(start, end) for each pair, vectorized.
+    """
+    lengths = ends - starts
+    if lengths.sum() == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return np.arange(lengths.sum()) + offsets
+
+
+def follow_links(graph, ranks):
+    """
+    Return the rank each page receives through links alone, i.e. the
+    CSR transition matrix times `ranks`, without dangling or teleport mass.
+
+    Each page's rank is divided by its out-degree once, then summed over
+    the in-links of each page, BLOCK_LINKS links at a time. Only the
+    rank vectors are held in memory, so the link arrays can be mapped
+    from disk.
+    """
+    in_indptr, in_indices = graph.in_links()
+    shares = np.divide(ranks, graph.out_degree, out=np.zeros(graph.num_pages), where=~graph.dangling)
+    flow = np.empty(graph.num_pages)
+    # Blocks cover every page from 0, so pages without in-links get 0 too
+    cuts = np.searchsorted(in_indptr, np.arange(0, graph.num_links, BLOCK_LINKS), side="right") - 1
+    bounds = np.unique(np.concatenate(([0], cuts, [graph.num_pages])))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        rows = np.asarray(in_indptr[lo:hi + 1])
+        sums = np.zeros(rows[-1] - rows[0] + 1)
+        np.cumsum(shares[in_indices[rows[0]:rows[-1]]], out=sums[1:])
+        flow[lo:hi] = sums[rows[1:] - rows[0]] - sums[rows[:-1] - rows[0]]
+    return flow
+
+
+def step(graph, ranks, damping_factor):
+    """
+    Apply one random-surfer step to `ranks`: dangling pages spread
+    their rank evenly over the corpus and every page gets the teleport
+    share (1 - damping_factor) / N.
+    """
+    n = graph.num_pages
+    dangling_mass = ranks[graph.dangling].sum()
+    return damping_factor * (follow_links(graph, ranks) + dangling_mass / n) + (1 - damping_factor) / n
+
+
+def power_iteration(graph, damping_factor, tol=TOLERANCE, max_iterations=1000, start=None):
+    """
+    Run power iteration on `graph` from `start` (uniform by default)
+    until successive rank vectors are within `tol` in L1 norm.
+
+    Returns the rank vector and the number of iterations taken.
+    """
+    n = graph.num_pages
+    ranks = np.full(n, 1 / n) if start is None else np.asarray(start, dtype=np.float64)
+    for iteration in range(1, max_iterations + 1):
+        updated = step(graph, ranks, damping_factor)
+        residual = np.abs(updated - ranks).sum()
+        ranks = updated
+        if residual < tol:
+            break
+    return ranks / ranks.sum(), iteration
@@ -0,0 +1,144 @@
+import numpy as np
+
+
+class LinkGraph():
+    """
+    A crawled corpus with pages numbered 0..N-1 in name order.
+    The arrays may be memory-mapped from a graph file (see graphfile.py).
+
+    Links are stored twice in CSR form: `out_indices[out_indptr[p]:out_indptr[p + 1]]`
+    are the pages `p` links to, and `in_indices[in_indptr[p]:in_indptr[p + 1]]`
+    are the pages linking to `p`. The second is the transition matrix of
+    the random surfer transposed, with each entry weighted 1 / out-degree
+    of its source page. Pages without links are `dangling`.
+    """
+
+    def __init__(self, names, out_indptr, out_indices, in_links=None):
+        self.names = names
+        self.out_indptr = out_indptr
+        self.out_indices = out_indices
+        self.out_degree = np.diff(out_indptr).astype(np.int32)
+        self.dangling = self.out_degree == 0
+        self._in_links = in_links
+        self._transpose = None
+        self._index = None
+        self.path = None  # Graph file the arrays are mapped from, if any
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a graph from a `crawl` dictionary of page -> set of linked pages.
+        """
+        names = sorted(corpus)
+        index = {name: i for i, name in enumerate(names)}
+        sources, targets = [], []
+        for name in names:
+            for link in corpus[name]:
+                if link in index and link != name:
+                    sources.append(index[name])
+                    targets.append(index[link])
+        return cls.from_edges(len(names), np.array(sources, dtype=np.int64),
+                              np.array(targets, dtype=np.int64), names)
+
+    @classmethod
+    def from_edges(cls, num_pages, sources, targets, names=None):
+        """
+        Build a graph from parallel arrays of link sources and targets.
+        Self-links and repeated links are dropped.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        keep = sources != targets
+        keys = np.unique(sources[keep] * num_pages + targets[keep])
+        sources, targets = keys // num_pages, keys % num_pages
+        out_indptr = np.zeros(num_pages + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_pages), out=out_indptr[1:])
+        if names is None:
+            names = [str(i) for i in range(num_pages)]
+        return cls(names, out_indptr, targets.astype(np.int32))
+
+    @property
+    def num_pages(self):
+        return len(self.out_indptr) - 1
+
+    @property
+    def num_links(self):
+        return len(self.out_indices)
+
+    @property
+    def index(self):
+        """
+        Dict from page name to page number, built on first use.
+        """
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return self._index
+
+    def in_links(self):
+        """
+        Return (in_indptr, in_indices): for each page, in CSR form, the
+        pages linking to it.
+        """
+        if self._in_links is None:
+            sources = np.repeat(np.arange(self.num_pages, dtype=np.int32), self.out_degree)
+            order = np.argsort(self.out_indices, kind="stable")
+            in_indptr = np.zeros(self.num_pages + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.out_indices, minlength=self.num_pages), out=in_indptr[1:])
+            self._in_links = (in_indptr, sources[order])
+        return self._in_links
+
+    def transpose(self):
+        """
+        Return (in_indptr, in_indices, in_weights): the transition matrix in
+        CSR form, one row per target page, weighted by 1 / out-degree.
+        The weights are held in memory even for a memory-mapped graph.
+        """
+        if self._transpose is None:
+            in_indptr, in_indices = self.in_links()
+            self._transpose = (in_indptr, in_indices, 1.0 / self.out_degree[in_indices])
+        return self._transpose
+
+    def links(self, page):
+        """
+        Return the page numbers that page number `page` links to.
+        """
+        return self.out_indices[self.out_indptr[page]:self.out_indptr[page + 1]]
+
+    def transition_row(self, page, damping_factor):
+        """
+        Return (links, link_probability, teleport) for page number `page`:
+        the surfer follows each of `links` with `link_probability` and
+        also lands on every page, linked or not, with `teleport`. A
+        dangling page has no links and teleports with probability 1 / N.
+        """
+        links = self.links(page)
+        if len(links) == 0:
+            return links, 0.0, 1 / self.num_pages
+        return links, damping_factor / len(links), (1 - damping_factor) / self.num_pages
+
+    def top(self, ranks, k):
+        """
+        Return the `k` highest (name, rank) pairs of a rank vector, best
+        first, partitioning instead of sorting the whole vector.
+        """
+        k = min(k, len(ranks))
+        if k <= 0:
+            return []
+        best = np.argpartition(ranks, len(ranks) - k)[len(ranks) - k:]
+        best = best[np.lexsort((best, -ranks[best]))]
+        return [(self.names[page], float(ranks[page])) for page in best]
+
+    def to_corpus(self):
+        """
+        Return the graph as a `crawl`-style dictionary of sets.
+        """
+        return {
+            name: {self.names[link] for link in self.links(page)}
+            for page, name in enumerate(self.names)
+        }
+
+    def to_dict(self, ranks):
+        """
+        Pair a rank vector with page names.
+        """
+        return {name: float(rank) for name, rank in zip(self.names, ranks)}
@@ -1,17 +1,30 @@
+import heapq
 import os
-import random
-import re
 import sys
-import math
+
+import crawler
+import graphfile
+from iteration import TOLERANCE, power_iteration
+from linkgraph import LinkGraph
+from personalized import personalized_pagerank, teleport_matrix
+from sampling import parallel_walk_counts, random_walk_counts
+from solvers import solve
 
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python pagerank.py corpus [top]")
+    if os.path.isfile(sys.argv[1]):
+        corpus = graphfile.read_graph(sys.argv[1])  # A graph file, ranked straight from disk
+        if corpus is None:
+            sys.exit(f"{sys.argv[1]} is not a PageRank graph file")
+    else:
+        corpus = crawl(sys.argv[1])
+    if len(sys.argv) == 3:
+        return report_top(link_graph(corpus), int(sys.argv[2]))
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
@@ -22,31 +35,41 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def report_top(graph, k):
+    """
+    Print only the `k` best pages by each method, working on rank
+    vectors so that no per-page dictionary is built.
+    """
+    counts = random_walk_counts(graph, DAMPING, SAMPLES)
+    print(f"Top {k} PageRank Results from Sampling (n = {SAMPLES})")
+    for page, rank in graph.top(counts / SAMPLES, k):
+        print(f"  {page}: {rank:.4f}")
+    ranks, _ = power_iteration(graph, DAMPING)
+    print(f"Top {k} PageRank Results from Iteration")
+    for page, rank in graph.top(ranks, k):
+        print(f"  {page}: {rank:.4f}")
+
+
+def crawl(directory, workers=None, use_cache=True):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
 
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    Pages are parsed incrementally on a pool of `workers` threads, and
+    the links found are cached in the directory so that later crawls only
+    re-parse files whose size or modification time changed.
+    """
+    return crawler.crawl(directory, workers, use_cache)
 
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
 
-    return pages
+def link_graph(corpus):
+    """
+    Return `corpus` as a LinkGraph. A LinkGraph, such as one mapped from
+    a graph file by graphfile.read_graph, is used as it is, so graphs
+    too large for memory can be ranked from disk.
+    """
+    return corpus if isinstance(corpus, LinkGraph) else LinkGraph.from_corpus(corpus)
 
 
 def transition_model(corpus, page, damping_factor):
@@ -72,7 +95,34 @@ def transition_model(corpus, page, damping_factor):
     return model  # Return model
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sparse_transition_model(corpus, page, damping_factor):
+    """
+    Return the transition model of `page` without an entry for every
+    page: a dictionary of the pages it links to with their probability,
+    and the probability of each page it does not link to.
+
+    Matches transition_model, where every page gets the teleport share
+    (1 - damping_factor) / N and linked pages also get
+    damping_factor / (number of links).
+    """
+
+    links = corpus[page]
+    if not links:  # A page with no links jumps to any page with equal probability
+        return {}, 1 / len(corpus)
+    teleport = (1 - damping_factor) / len(corpus)  # Share every page gets
+    return {link: teleport + damping_factor / len(links) for link in links}, teleport
+
+
+def top_pages(ranks, k):
+    """
+    Return the `k` (page, rank) pairs with the highest rank, best first,
+    using a heap instead of sorting every page.
+    """
+
+    return heapq.nlargest(k, ranks.items(), key=lambda item: item[1])
+
+
+def sample_pagerank(corpus, damping_factor, n, walkers=1024, seed=None, processes=1):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -80,28 +130,24 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-
-    page_rank = dict()  # Init empty dict
-    for key in corpus:  # Populate page_rank
-        page_rank[key] = 0.0  # Set init values to 0.0
-
-    random_page = random.choice((list(corpus.keys())))  # Start with random page of equal prob
-    page_rank[random_page] = (1/len(corpus))  # Set init value to equal prob for the random page
 
-    for i in range(n):  # Loop over n times
-        sample_model = transition_model(corpus, random_page, damping_factor)  # Get a sample model with the random page
-        for key in sample_model:  # For all keys in sample model
-            page_rank[key] += sample_model[key]  # Add them to our page rank dict
-        random_page = random.choices(list(corpus.keys()), weights=list(page_rank.values()), k=1)[0]  # Get the next page rank by a random choice based on the values of the pages
-
-    for key in page_rank:  # For all keys
-        page_rank[key] /= n  # Normalize them by dividing by n
+    The samples are shared between `walkers` random surfers moved together
+    with NumPy. Each step flips the damping coin, then follows a uniformly
+    chosen outlink or teleports to a uniformly chosen page, so a sample
+    costs O(1) work whatever the corpus size. `seed` makes runs repeatable.
+    With `processes` above 1, the samples are split across a process pool
+    sharing the outlink arrays, each worker with its own RNG stream.
+    """
 
-    return page_rank  # Return page_rank
+    graph = link_graph(corpus)  # Number the pages and build outlink arrays
+    if processes > 1:
+        counts = parallel_walk_counts(graph, damping_factor, n, processes, walkers, seed)  # Split samples over workers
+    else:
+        counts = random_walk_counts(graph, damping_factor, n, walkers, seed)  # Visits per page over n samples
+    return graph.to_dict(counts / n)  # Normalize visit counts into ranks
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, tol=TOLERANCE, method="jacobi", norm="l1"):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -109,34 +155,35 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-
-    page_rank = dict()  # Init empty dicts
-    temp_rank = dict()  # ""
-    for key in corpus:  # Loop through keys
-        page_rank[key] = 1 / len(corpus)  # Assign initial value of equal prob
 
-    repeat = True  # Bool condition
+    The corpus is turned into a sparse transition matrix and the updates
+    run as vectorized power iteration, stopping once successive rank
+    vectors are within `tol` of each other in the `norm` ("l1", "l2" or
+    "linf"). `method` picks another solver from solvers.py, such as
+    "gauss-seidel" or "quadratic" extrapolation.
+    """
 
-    while repeat:  # While repeat
-        for page in page_rank:  # For each page in page_rank
-            tot = 0.0  # Init & assign tot
+    graph = link_graph(corpus)  # Number the pages and build the CSR matrix
+    if method == "jacobi" and norm == "l1":
+        ranks, _ = power_iteration(graph, damping_factor, tol)  # Iterate until the L1 change is below tol
+    else:
+        ranks = solve(graph, damping_factor, method, tol, norm).ranks  # Run the chosen solver
+    return graph.to_dict(ranks)  # Map the rank vector back to page names
 
-            for p in corpus:  # For each page(p) in corpus
-                if page in corpus[p]:  # If page is in corpus[p], meaning if page is in p's links
-                    tot += page_rank[p] / len(corpus[p])  # Add the value of page_rank[p] / number of total links
-                if not corpus[p]:  # Else if it doesn't have links
-                    tot += page_rank[p] / len(corpus)  # The total is the value of p in page_rank / total number of pages
-            temp_rank[page] = (1 - damping_factor) / len(corpus) + damping_factor * tot  # Assign temp_rank[page] values received by algorithm
 
-        repeat = False  # Set repeat to false
+def personalize_pagerank(corpus, damping_factor, seed_sets, tol=TOLERANCE):
+    """
+    Return a list of PageRank dictionaries, one per set of seed pages in
+    `seed_sets`, where the random surfer teleports only to that set's pages.
 
-        for page in page_rank:  # Loop
-            if not math.isclose(temp_rank[page], page_rank[page], abs_tol=0.001):  # If the values are not converging (difference by 0.001)
-                repeat = True  # Then repeat the loop
-            page_rank[page] = temp_rank[page]  # Assign the values in temp_rank to page_rank
+    All the sets are iterated together as one sparse matrix times dense
+    matrix product per step.
+    """
 
-    return page_rank  # return page_rank
+    graph = link_graph(corpus)  # Number the pages and build the CSR matrix
+    seeds = [[graph.index[page] for page in pages] for pages in seed_sets]  # Seed names to page numbers
+    ranks = personalized_pagerank(graph, damping_factor, teleport_matrix(graph, seeds), tol)  # One column per set
+    return [graph.to_dict(column) for column in ranks.T]  # Map each column back to page names
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import numpy as np
+
+from iteration import TOLERANCE
+
+# Teleport vectors iterated together per batch
+BATCH_COLUMNS = 64
+
+# Link x vector products formed per block of the batched product, sized to stay in cache
+BLOCK_ELEMENTS = 2 ** 14
+
+
+def teleport_matrix(graph, seed_sets):
+    """
+    Return an (N, k) matrix whose columns spread teleport probability
+    evenly over each of the `seed_sets` of page numbers.
+    """
+    teleport = np.zeros((graph.num_pages, len(seed_sets)))
+    for column, seeds in enumerate(seed_sets):
+        seeds = np.unique(np.asarray(seeds, dtype=np.int64))
+        if len(seeds) == 0:
+            raise ValueError(f"seed set {column} is empty")
+        teleport[seeds, column] = 1 / len(seeds)
+    return teleport
+
+
+def link_blocks(graph, block_links):
+    """
+    Split the transition matrix rows into blocks of about `block_links`
+    links each, as (first link, last link, non-empty rows, row starts
+    relative to the block) tuples.
+    """
+    in_indptr, _, _ = graph.transpose()
+    cuts = np.searchsorted(in_indptr, np.arange(0, graph.num_links, max(1, block_links)), side="right") - 1
+    bounds = np.unique(np.concatenate(([0], cuts, [graph.num_pages])))
+    blocks = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        rows = np.arange(lo, hi)
+        rows = rows[in_indptr[rows + 1] > in_indptr[rows]]
+        if len(rows):
+            blocks.append((in_indptr[lo], in_indptr[hi], rows, in_indptr[rows] - in_indptr[lo]))
+    return blocks
+
+
+def follow_links_batch(graph, ranks, blocks):
+    """
+    Multiply the transition matrix by each column of the (N, k) `ranks`.
+
+    The (links x k) products are formed one block of rows at a time so
+    that they stay in cache; gathering them for all links at once is
+    bound by memory bandwidth and slower than k separate products.
+    """
+    _, in_indices, in_weights = graph.transpose()
+    flow = np.zeros_like(ranks)
+    for first, last, rows, starts in blocks:
+        products = in_weights[first:last, None] * ranks[in_indices[first:last]]
+        flow[rows] = np.add.reduceat(products, starts, axis=0)
+    return flow
+
+
+def batch_iteration(graph, damping_factor, teleport, tol=TOLERANCE, max_iterations=1000):
+    """
+    Power iteration for every column of `teleport` at once.
+
+    The surfer teleports according to its column instead of uniformly,
+    and so do dangling pages. Columns that are within `tol` of their
+    previous value in L1 norm are set aside and the rest keep iterating.
+    Returns the (N, k) ranks and the number of iterations of the slowest
+    column.
+    """
+    ranks = np.empty_like(teleport, dtype=np.float64)
+    active = np.arange(teleport.shape[1])
+    current, jump = teleport.astype(np.float64), teleport.astype(np.float64)
+    blocks = link_blocks(graph, BLOCK_ELEMENTS // len(active))
+    dangling = np.flatnonzero(graph.dangling)
+    iterations = 0
+    while len(active) and iterations < max_iterations:
+        iterations += 1
+        dangling_mass = current[dangling].sum(axis=0)
+        updated = damping_factor * follow_links_batch(graph, current, blocks)
+        updated += (damping_factor * dangling_mass + 1 - damping_factor) * jump
+        moving = np.abs(updated - current).sum(axis=0) >= tol
+        current = updated
+        if not moving.all():
+            # Store converged columns and carry on with a compact array
+            ranks[:, active[~moving]] = current[:, ~moving]
+            active = active[moving]
+            current, jump = np.ascontiguousarray(current[:, moving]), np.ascontiguousarray(jump[:, moving])
+            if len(active):
+                blocks = link_blocks(graph, BLOCK_ELEMENTS // len(active))
+    ranks[:, active] = current
+    return ranks / ranks.sum(axis=0), iterations
+
+
+def personalized_pagerank(graph, damping_factor, teleport, tol=TOLERANCE, max_iterations=1000,
+                          batch=BATCH_COLUMNS):
+    """
+    Return the (N, k) personalized PageRank for each column of the
+    (N, k) `teleport` matrix, computed `batch` columns at a time as one
+    sparse x dense iteration each.
+    """
+    ranks = np.empty_like(teleport, dtype=np.float64)
+    for start in range(0, teleport.shape[1], batch):
+        columns = slice(start, start + batch)
+        ranks[:, columns], _ = batch_iteration(graph, damping_factor, teleport[:, columns], tol, max_iterations)
+    return ranks
+
+
+class FingerprintIndex():
+    """
+    Monte Carlo fingerprints for approximate personalized PageRank
+    (Fogaras et al., 2005).
+
+    For every page, `walks` random walks are run that stop with
+    probability 1 - damping_factor at each step and restart from their
+    page at a dangling page. The page a walk stops on is a sample of the
+    personalized PageRank of its start page, so a query only counts the
+    stored endpoints of its seeds.
+    """
+
+    def __init__(self, endpoints):
+        self.endpoints = endpoints
+
+    @classmethod
+    def build(cls, graph, damping_factor, walks=64, seed=None):
+        rng = np.random.default_rng(seed)
+        starts = np.repeat(np.arange(graph.num_pages, dtype=np.int32), walks)
+        endpoints = starts.copy()
+        walking = np.arange(len(starts))
+        while len(walking):
+            # Walks that stop keep their current page as endpoint
+            walking = walking[rng.random(len(walking)) < damping_factor]
+            pages = endpoints[walking]
+            degree = graph.out_degree[pages]
+            moved = starts[walking].copy()
+            linked = degree > 0
+            choice = (rng.random(linked.sum()) * degree[linked]).astype(np.int64)
+            moved[linked] = graph.out_indices[graph.out_indptr[pages[linked]] + choice]
+            endpoints[walking] = moved
+        return cls(endpoints.reshape(graph.num_pages, walks))
+
+    @property
+    def walks(self):
+        return self.endpoints.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.endpoints.nbytes
+
+    def query(self, seeds):
+        """
+        Return (pages, ranks) arrays: the approximate personalized
+        PageRank of the seed page numbers, nonzero entries only.
+
+        Several seeds give the average of their single-seed ranks, which
+        differs slightly from teleporting to the whole set when the walks
+        reach dangling pages.
+        """
+        samples = self.endpoints[np.asarray(seeds, dtype=np.int64)].ravel()
+        pages, counts = np.unique(samples, return_counts=True)
+        return pages, counts / len(samples)
+
+    def dense(self, seeds, num_pages):
+        """
+        Return the approximate personalized PageRank as a full vector.
+        """
+        ranks = np.zeros(num_pages)
+        pages, values = self.query(seeds)
+        ranks[pages] = values
+        return ranks
+
+    def save(self, path):
+        np.save(path, self.endpoints)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        return cls(np.load(path, mmap_mode="r" if mmap else None))
@@ -0,0 +1,143 @@
+import math
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import graphfile
+from linkgraph import LinkGraph
+
+# Samples are counted in batches of about this many visits
+BATCH_VISITS = 2 ** 20
+
+
+def burn_in_steps(damping_factor, tolerance=1e-4):
+    """
+    Steps after which a walker has forgotten its starting page: each step
+    keeps the walk correlated with the past only with probability
+    `damping_factor`.
+    """
+    if damping_factor <= 0:
+        return 0
+    if damping_factor >= 1:
+        raise ValueError("damping_factor must be below 1 for the walk to mix")
+    return math.ceil(math.log(tolerance) / math.log(damping_factor))
+
+
+def walk_step(graph, pages, damping_factor, rng):
+    """
+    Move every walker in `pages` one step: with probability
+    `damping_factor` follow a uniformly chosen outlink, otherwise (or
+    from a dangling page) jump to a uniformly chosen page.
+    """
+    degree = graph.out_degree[pages]
+    follow = (rng.random(len(pages)) < damping_factor) & (degree > 0)
+    following = pages[follow]
+    choice = (rng.random(len(following)) * degree[follow]).astype(np.int64)
+    moved = rng.integers(graph.num_pages, size=len(pages))
+    moved[follow] = graph.out_indices[graph.out_indptr[following] + choice]
+    return moved
+
+
+def random_walk_counts(graph, damping_factor, n, walkers=1024, seed=None, burn_in=None):
+    """
+    Count the pages visited by `walkers` independent random surfers
+    taking `n` counted steps between them.
+
+    Walkers start on uniformly random pages and take `burn_in` uncounted
+    steps first (enough to forget the start by default). Each step costs
+    O(walkers) array work regardless of corpus size.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    walkers = max(1, min(walkers, n))
+    if burn_in is None:
+        burn_in = burn_in_steps(damping_factor)
+
+    pages = rng.integers(graph.num_pages, size=walkers)
+    for _ in range(burn_in):
+        pages = walk_step(graph, pages, damping_factor, rng)
+
+    counts = np.zeros(graph.num_pages, dtype=np.int64)
+    batch = []
+    batched = 0
+    remaining = n
+    while remaining > 0:
+        visits = pages[:remaining]
+        batch.append(visits)
+        batched += len(visits)
+        remaining -= len(visits)
+        if batched >= BATCH_VISITS or remaining <= 0:
+            counts += np.bincount(np.concatenate(batch), minlength=graph.num_pages)
+            batch, batched = [], 0
+        if remaining > 0:
+            pages = walk_step(graph, pages, damping_factor, rng)
+    return counts
+
+
+def share_array(array):
+    """
+    Copy `array` into a new shared memory block.
+    Returns the block and a picklable (name, dtype, shape) description.
+    """
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.dtype.str, array.shape)
+
+
+def walk_worker(task):
+    """
+    Attach to the shared outlink arrays (or map the graph file) and
+    return the visit counts of one worker's share of the samples.
+    """
+    arrays, damping_factor, n, walkers, seed_sequence, burn_in = task
+    if isinstance(arrays, str):
+        graph = graphfile.read_graph(arrays)
+        return random_walk_counts(graph, damping_factor, n, walkers,
+                                  np.random.default_rng(seed_sequence), burn_in)
+    indptr, indices = arrays
+    blocks = [SharedMemory(name=name) for name, _, _ in (indptr, indices)]
+    try:
+        out_indptr, out_indices = (
+            np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+            for block, (_, dtype, shape) in zip(blocks, (indptr, indices))
+        )
+        graph = LinkGraph(None, out_indptr, out_indices)
+        counts = random_walk_counts(graph, damping_factor, n, walkers,
+                                    np.random.default_rng(seed_sequence), burn_in)
+        del graph, out_indptr, out_indices
+        return counts
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def parallel_walk_counts(graph, damping_factor, n, processes=None, walkers=1024, seed=None, burn_in=None):
+    """
+    Split `n` samples across a pool of `processes` workers, each running
+    `walkers` walkers with its own independent RNG stream.
+
+    The outlink arrays are placed in shared memory once and attached by
+    every worker, and the per-worker visit counts are summed at the end.
+    Workers map a memory-mapped graph's file themselves instead.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    shares = [n // processes + (i < n % processes) for i in range(processes)]
+    streams = np.random.SeedSequence(seed).spawn(processes)
+
+    blocks, arrays = [], []
+    try:
+        for array in (graph.out_indptr, graph.out_indices) if graph.path is None else ():
+            block, description = share_array(array)
+            blocks.append(block)
+            arrays.append(description)
+        tasks = [
+            (arrays if graph.path is None else graph.path, damping_factor, share, walkers, stream, burn_in)
+            for share, stream in zip(shares, streams) if share
+        ]
+        with multiprocessing.Pool(processes) as pool:
+            counts = pool.map(walk_worker, tasks)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return np.sum(counts, axis=0)